@@ -2,11 +2,16 @@ import pygame
 import sys
 import random
 import cv2
+import numpy as np
 import mediapipe as mp
 import math
 import os 
 import threading
 import time
+import struct
+import queue
+import itertools
+from collections import deque, namedtuple
 
 # --- Path Setup ---
 if '__file__' in globals():
@@ -37,94 +42,1199 @@ def load_font(font_key, size):
     return pygame.font.Font(pygame.font.match_font('arial'), size)
 
 # --- Fungsi Bantuan CV ---
-def get_distance(p1, p2):
-    return math.sqrt((p1.x - p2.x)**2 + (p1.y - p2.y)**2)
-
 def get_pixel_dist(center1, center2):
     return math.sqrt((center1[0] - center2[0])**2 + (center1[1] - center2[1])**2)
 
 # --- Inisialisasi CV dan MediaPipe ---
-cap = cv2.VideoCapture(0)
+# Kamera & model dibuka lazy lewat init_camera() supaya mode headless
+# (tanpa kamera) tidak ikut membuka device.
+cap = None
 mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(
-    model_complexity=1,              
-    max_num_hands=1,
-    min_detection_confidence=0.5,    
-    min_tracking_confidence=0.5)
-
-camera_available = cap.isOpened()
-cv_lock = threading.Lock()
-cv_running = threading.Event()
-cv_running.set()
-latest_cv = {
-    'results': None,
-    'index_x_frac': 0.5,
-    'index_y_frac': 0.5, 
+tracker = None
+camera_available = False
+
+# Minta langsung resolusi kecil ke device: input inference cuma 320 px,
+# jadi decode frame 720p/1080p lalu di-resize hanya buang CPU.
+CAPTURE_CONFIG = {
+    'index': 0,
+    'width': 320,
+    'height': 240,
+    'fps': 30,
+    'fourcc': ('MJPG', 'YUYV'), # Dicoba berurutan
+    'buffersize': 1,            # Frame selalu yang terbaru, bukan antrian lama
+}
+capture_info = {}
+
+def fourcc_to_str(value):
+    value = int(value)
+    return "".join(chr((value >> (8 * i)) & 0xFF) for i in range(4)) if value > 0 else "?"
+
+def configure_capture(cap, config):
+    """Negosiasi resolusi/FPS/format/buffer dengan device lalu cek hasil sebenarnya."""
+    for fourcc in config['fourcc']:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+        if fourcc_to_str(cap.get(cv2.CAP_PROP_FOURCC)) == fourcc:
+            break
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, config['width'])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config['height'])
+    cap.set(cv2.CAP_PROP_FPS, config['fps'])
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, config['buffersize'])
+
+    info = {
+        'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        'fps': cap.get(cv2.CAP_PROP_FPS),
+        'fourcc': fourcc_to_str(cap.get(cv2.CAP_PROP_FOURCC)),
+        'buffersize': int(cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+    }
+    print(f"[camera] diminta {config['width']}x{config['height']}@{config['fps']} {'/'.join(config['fourcc'])}, "
+          f"didapat {info['width']}x{info['height']}@{info['fps']:.0f} {info['fourcc']} buffer={info['buffersize']}")
+    return info
+
+# --- Frame Sources ---
+# camera_thread_loop hanya butuh antarmuka ala cv2.VideoCapture: grab(),
+# retrieve(dst), release(), isOpened(). Selain webcam ada sumber offline
+# (file video, urutan gambar, frame sintetis) supaya pipeline CV bisa dites &
+# dibenchmark tanpa kamera. realtime=True memacu frame sesuai FPS aslinya
+# (frame yang terlewat di-skip seperti kamera sungguhan), False = secepatnya.
+# Sumber yang habis memasang eof=True dan loop kamera berhenti.
+class FrameSource:
+    eof = False
+
+    def __init__(self, fps=30.0, realtime=True, loop=False):
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.realtime = realtime
+        self.loop = loop
+        self.index = -1 # Frame terakhir yang di-grab
+        self.skipped = 0
+        self.t_start = None
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+    def frame_count(self):
+        return None # Tak terbatas
+
+    def _seek(self, n):
+        """Majukan sumber ke frame n (n > self.index). False jika habis."""
+        raise NotImplementedError
+
+    def _rewind(self):
+        pass
+
+    def grab(self):
+        if self.eof:
+            return False
+        n = self.index + 1
+        if self.realtime:
+            now = time.perf_counter()
+            if self.t_start is None:
+                self.t_start = now - n / self.fps
+            due = self.t_start + n / self.fps
+            if due > now:
+                time.sleep(due - now)
+            else:
+                # Tertinggal -> lompat ke frame yang sedang "tayang"
+                n = max(n, int((now - self.t_start) * self.fps))
+                self.skipped += n - self.index - 1
+        count = self.frame_count()
+        if (count is not None and n >= count) or not self._seek(n):
+            if not self.loop:
+                self.eof = True
+                return False
+            self._rewind()
+            self.index, self.t_start = -1, None
+            return self.grab()
+        self.index = n
+        return True
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path, realtime=True, loop=False):
+        self.cap = cv2.VideoCapture(path)
+        super().__init__(self.cap.get(cv2.CAP_PROP_FPS), realtime, loop)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def _seek(self, n):
+        for _ in range(n - self.index):
+            if not self.cap.grab():
+                return False
+        return True
+
+    def _rewind(self):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def retrieve(self, image=None):
+        return self.cap.retrieve(image)
+
+    def release(self):
+        self.cap.release()
+
+class ImageSequenceSource(FrameSource):
+    def __init__(self, pattern, fps=30.0, realtime=True, loop=False):
+        import glob
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, '*')
+        exts = ('.png', '.jpg', '.jpeg', '.bmp')
+        self.paths = sorted(p for p in glob.glob(pattern) if p.lower().endswith(exts))
+        super().__init__(fps, realtime, loop)
+
+    def isOpened(self):
+        return bool(self.paths)
+
+    def frame_count(self):
+        return len(self.paths)
+
+    def _seek(self, n):
+        return True
+
+    def retrieve(self, image=None):
+        frame = cv2.imread(self.paths[self.index])
+        if frame is None:
+            return False, None
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return True, image
+        return True, frame
+
+class SyntheticSource(FrameSource):
+    """Frame buatan: blob warna kulit bergerak di atas latar gelap."""
+    def __init__(self, width=320, height=240, fps=30.0, frames=None, realtime=True, loop=False):
+        self.shape = (height, width, 3)
+        self.frames = frames
+        super().__init__(fps, realtime, loop)
+
+    def frame_count(self):
+        return self.frames
+
+    def _seek(self, n):
+        return True
+
+    def retrieve(self, image=None):
+        if image is None or image.shape != self.shape:
+            image = np.empty(self.shape, np.uint8)
+        h, w = self.shape[:2]
+        t = self.index / self.fps
+        image[:] = (40, 40, 40)
+        center = (int(w * (0.5 + 0.3 * math.sin(t * 1.3))), int(h * (0.5 + 0.3 * math.sin(t * 2.1))))
+        cv2.ellipse(image, center, (w // 10, h // 6), 0, 0, 360, (120, 160, 220), -1)
+        return True, image
+
+def open_frame_source(spec=None, realtime=True, loop=False):
+    """Spec: None/angka = webcam, 'synthetic[:WxH]', folder/glob gambar, rekaman landmark .npz, atau file video."""
+    if spec is None:
+        spec = CAPTURE_CONFIG['index']
+    spec = str(spec)
+    if spec.isdigit():
+        source = cv2.VideoCapture(int(spec))
+        if source.isOpened():
+            capture_info.update(configure_capture(source, CAPTURE_CONFIG))
+        return source
+    if spec.endswith('.npz'):
+        return LandmarkPlayback(spec, realtime=realtime, loop=loop)
+    if spec.startswith('synthetic'):
+        w, h = CAPTURE_CONFIG['width'], CAPTURE_CONFIG['height']
+        if ':' in spec:
+            w, h = (int(v) for v in spec.split(':', 1)[1].lower().split('x'))
+        return SyntheticSource(w, h, CAPTURE_CONFIG['fps'], realtime=realtime, loop=loop)
+    if os.path.isdir(spec) or any(c in spec for c in '*?['):
+        return ImageSequenceSource(spec, CAPTURE_CONFIG['fps'], realtime=realtime, loop=loop)
+    return VideoFileSource(spec, realtime=realtime, loop=loop)
+
+def create_hands(model_complexity=1, max_num_hands=None):
+    return mp_hands.Hands(
+        model_complexity=model_complexity,              
+        max_num_hands=max_num_hands or CV_HANDS,
+        min_detection_confidence=0.5,    
+        min_tracking_confidence=0.5)
+
+def init_camera(cv_process=False, source=None, realtime=True, loop=True):
+    global cap, tracker, camera_available, cv_worker
+    cap = open_frame_source(source, realtime=realtime, loop=loop)
+    camera_available = cap.isOpened()
+    if isinstance(cap, LandmarkPlayback) or not camera_available:
+        return camera_available # Landmark sudah jadi, model tidak dibutuhkan
+    tracker = select_tracker()
+    if cv_process and tracker.name == 'mediapipe':
+        # Inference di proses terpisah; proses game tidak perlu model sendiri
+        tracker.close()
+        tracker = None
+        cv_worker = CvWorkerClient(model_complexity=cv_controller.complexity)
+    return camera_available
+
+# --- Hand Trackers ---
+# Backend di balik antarmuka hands.process: process(image_rgb) -> objek dengan
+# multi_hand_landmarks (list landmark 21 titik, fraksi gambar input),
+# set_complexity(), close(). MediaPipeTracker = model asli. SkinTracker =
+# fallback murah untuk CPU lemah: kontur warna kulit (YCrCb) terbesar, ujung
+# telunjuk = titik teratas, "lubang" di kontur = pinch (jempol menyentuh
+# telunjuk), kontur kompak = kepalan. Hasilnya disusun jadi landmark sintetis
+# supaya ekstraksi fitur, ROI dan rekaman tetap satu jalur.
+# Backend 'auto' dipilih dari micro-benchmark MediaPipe saat start.
+TRACKER_CONFIG = {
+    'backend': 'auto',   # 'auto', 'mediapipe', atau 'skin'
+    'budget_ms': 40.0,   # MediaPipe lebih lambat dari ini (median) -> skin
+    'bench_frames': 8,
+}
+
+class MediaPipeTracker:
+    name = 'mediapipe'
+
+    def __init__(self, model_complexity=1):
+        self.complexity = model_complexity
+        self.hands = create_hands(model_complexity)
+
+    def process(self, image_rgb):
+        return self.hands.process(image_rgb)
+
+    def set_complexity(self, model_complexity):
+        if model_complexity != self.complexity:
+            self.hands.close()
+            self.hands = create_hands(model_complexity)
+            self.complexity = model_complexity
+
+    def close(self):
+        self.hands.close()
+
+class SkinTracker:
+    name = 'skin'
+
+    # Wajah pemain biasanya juga di frame dan sering jadi blob kulit terbesar
+    # (kompak -> terbaca kepalan). Blob wajah dibuang sebelum memilih kontur:
+    # lewat Haar cascade tiap face_every frame jika file cascade tersedia,
+    # dan selalu lewat aturan "menempel tepi atas & tidak turun ke bawah".
+    # Dari sisa kandidat, yang terdekat ke posisi tangan sebelumnya menang.
+    def __init__(self, min_area=0.02, fold_ratio=0.8, face_every=10, max_jump=0.35):
+        self.min_area = min_area     # Fraksi luas frame
+        self.fold_ratio = fold_ratio # Jarak puncak-pusat / sqrt(luas) di bawah ini = kepalan
+        self.face_every = face_every
+        self.max_jump = max_jump     # Lompatan maks (fraksi diagonal) untuk tetap mengikuti tangan lama
+        self.lower = np.array([0, 133, 77], np.uint8)
+        self.upper = np.array([255, 173, 127], np.uint8)
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        self.ycrcb = None
+        self.mask = None
+        self.gray = None
+        self.faces = ()
+        self.frames = 0
+        self.prev_center = None # Pusat tangan terakhir (fraksi frame)
+        self.face_cascade = None
+        path = os.path.join(getattr(getattr(cv2, 'data', None), 'haarcascades', ''),
+                            'haarcascade_frontalface_default.xml')
+        if os.path.exists(path):
+            cascade = cv2.CascadeClassifier(path)
+            if not cascade.empty():
+                self.face_cascade = cascade
+
+    def _detect_faces(self, image_rgb):
+        h, w = image_rgb.shape[:2]
+        if self.gray is None or self.gray.shape != (h, w):
+            self.gray = np.empty((h, w), np.uint8)
+            self.frames = 0 # Ukuran input berubah (ROI/penuh): rect wajah lama tidak berlaku
+        if self.frames % self.face_every == 0:
+            cv2.cvtColor(image_rgb, cv2.COLOR_RGB2GRAY, dst=self.gray)
+            side = max(24, min(w, h) // 6)
+            self.faces = self.face_cascade.detectMultiScale(self.gray, 1.2, 4, minSize=(side, side))
+        self.frames += 1
+        return self.faces
+
+    def _is_face(self, rect, center, faces, w, h):
+        x, y, bw, bh = rect
+        if y <= 1 and y + bh < h * 0.6:
+            return True # Kepala menempel tepi atas; tangan+lengan biasanya turun ke bawah
+        for fx, fy, fw, fh in faces:
+            # Perluas ke bawah untuk leher yang ikut terdeteksi sebagai kulit
+            if fx - fw * 0.2 <= center[0] <= fx + fw * 1.2 and fy - fh * 0.2 <= center[1] <= fy + fh * 1.6:
+                return True
+        return False
+
+    def process(self, image_rgb):
+        h, w = image_rgb.shape[:2]
+        if self.mask is None or self.mask.shape != (h, w):
+            self.ycrcb = np.empty((h, w, 3), np.uint8)
+            self.mask = np.empty((h, w), np.uint8)
+        cv2.cvtColor(image_rgb, cv2.COLOR_RGB2YCrCb, dst=self.ycrcb)
+        cv2.inRange(self.ycrcb, self.lower, self.upper, dst=self.mask)
+        cv2.morphologyEx(self.mask, cv2.MORPH_OPEN, self.kernel, dst=self.mask)
+        contours, hierarchy = cv2.findContours(self.mask, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return LandmarkResults(None)
+        hierarchy = hierarchy[0]
+        faces = self._detect_faces(image_rgb) if self.face_cascade is not None else ()
+        candidates = []
+        for i in range(len(contours)):
+            if hierarchy[i][3] != -1:
+                continue
+            m = cv2.moments(contours[i])
+            if m['m00'] < self.min_area * w * h:
+                continue
+            center = (m['m10'] / m['m00'], m['m01'] / m['m00'])
+            if self._is_face(cv2.boundingRect(contours[i]), center, faces, w, h):
+                continue
+            candidates.append((i, m['m00'], center))
+        if not candidates:
+            self.prev_center = None
+            return LandmarkResults(None)
+        best, area, _ = max(candidates, key=lambda c: c[1])
+        if self.prev_center is not None:
+            px, py = self.prev_center[0] * w, self.prev_center[1] * h
+            dist, i, a = min((math.hypot(c[2][0] - px, c[2][1] - py), c[0], c[1]) for c in candidates)
+            if dist <= self.max_jump * math.hypot(w, h):
+                best, area = i, a
+        pinch = any(hierarchy[i][3] == best and cv2.contourArea(contours[i]) > 0.01 * area
+                    for i in range(len(contours)))
+
+        c = contours[best].reshape(-1, 2).astype(np.float64)
+        m = cv2.moments(contours[best])
+        center = np.array([m['m10'] / m['m00'], m['m01'] / m['m00']])
+        top = c[c[:, 1].argmin()]
+        wrist = np.array([center[0], c[:, 1].max()])
+        folded = np.linalg.norm(top - center) / math.sqrt(area) < self.fold_ratio
+        self.prev_center = (center[0] / w, center[1] / h)
+
+        lm = np.zeros((LANDMARK_COUNT, 3))
+        lm[:, :2] = center # MCP & sendi lain di pusat telapak
+        lm[WRIST, :2] = wrist
+        tucked = (center + wrist) * 0.5 # Lebih dekat ke pergelangan dari MCP = terlipat
+        lm[FINGER_TIPS, :2] = tucked
+        if not folded:
+            lm[FINGER_TIPS[1:3], :2] = top
+        if pinch:
+            lm[FINGER_TIPS[0], :2] = lm[FINGER_TIPS[1], :2]
+        else:
+            lm[FINGER_TIPS[0], :2] = c[np.abs(c[:, 0] - center[0]).argmax()] # Titik terjauh ke samping
+        lm[:, 0] /= w
+        lm[:, 1] /= h
+        return LandmarkResults([lm])
+
+    def set_complexity(self, model_complexity):
+        pass
+
+    def close(self):
+        pass
+
+TRACKERS = {'mediapipe': MediaPipeTracker, 'skin': SkinTracker}
+
+def benchmark_tracker(tracker, frames=8):
+    """Median ms per frame pada frame sintetis tanpa tangan (jalur terberat: deteksi penuh)."""
+    source = SyntheticSource(CAPTURE_CONFIG['width'], CAPTURE_CONFIG['height'], realtime=False)
+    times = []
+    for i in range(frames + 2):
+        source.grab()
+        ok, frame = source.retrieve()
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        t0 = time.perf_counter()
+        tracker.process(rgb)
+        if i >= 2: # 2 frame pertama = warm-up
+            times.append((time.perf_counter() - t0) * 1000.0)
+    return sorted(times)[len(times) // 2]
+
+def select_tracker(config=TRACKER_CONFIG):
+    backend = config['backend']
+    if backend != 'auto':
+        return TRACKERS[backend]() if backend == 'skin' else MediaPipeTracker(cv_controller.complexity)
+    # Kalibrasi hardware (settings.json) sudah mengukur inference MediaPipe:
+    # pakai hasilnya supaya startup tidak membayar benchmark kedua
+    calibration = load_settings().get('calibration')
+    if calibration is not None and 'infer_ms' in calibration:
+        ms = calibration['infer_ms']
+        ms = float('inf') if ms is None else ms # None = MediaPipe gagal dimuat saat kalibrasi
+        tracker, source = None, 'calibration'
+    else:
+        tracker = MediaPipeTracker(cv_controller.complexity)
+        ms = benchmark_tracker(tracker, config['bench_frames'])
+        source = 'benchmark'
+    choice = 'mediapipe' if ms <= config['budget_ms'] else 'skin'
+    print(f"[tracker] MediaPipe {ms:.1f}ms/frame ({source}, budget {config['budget_ms']:.0f}ms) -> {choice}")
+    telemetry.event('tracker_select', backend=choice, mediapipe_ms=round(ms, 2), budget_ms=config['budget_ms'],
+                    source=source)
+    if choice == 'mediapipe':
+        return tracker or MediaPipeTracker(cv_controller.complexity)
+    if tracker is not None:
+        tracker.close()
+    return SkinTracker()
+
+cv_stop = threading.Event()
+
+# Snapshot hasil CV: immutable, diganti utuh oleh thread kamera (assignment
+# referensi atomik), jadi game membaca satu view yang konsisten per tick tanpa
+# lock. seq naik per frame yang dipublish; capture_ts dipakai untuk cek basi.
+# Semua timestamp memakai time.perf_counter() (monotonic, sama antar proses).
+CvSnapshot = namedtuple('CvSnapshot', (
+    'seq', 'capture_ts', 'publish_ts',
+    'index_x_frac', 'index_y_frac', 'pinch_distance',
+    'index_folded', 'middle_folded', 'hand_present',
+    'infer_ms', 'results', 'preprocess_ms',
+), defaults=(0.0,))
+EMPTY_CV = CvSnapshot(0, 0.0, 0.0, 0.5, 0.5, None, False, False, False, 0.0, None)
+latest_cv = EMPTY_CV
+# Mode co-op: satu snapshot per slot pemain, dipublish sebagai satu tuple
+# (juga assignment atomik). latest_cv selalu = slot 0.
+CV_HANDS = 1 # Jumlah tangan yang dilacak per frame (2 = co-op)
+latest_players = (EMPTY_CV, EMPTY_CV)
+CV_STALE_AFTER = 0.5 # Detik; hasil lebih tua dari ini dianggap tangan hilang
+
+def cv_is_stale(snap, now=None):
+    if now is None:
+        now = time.perf_counter()
+    return snap.seq == 0 or now - snap.capture_ts > CV_STALE_AFTER
+
+CV_INTERVAL = 0.05 # Proses maksimal 1 frame per 50 ms (nilai awal controller)
+
+# --- Adaptive CV Controller ---
+# Mengukur waktu inference per frame (EMA) dan menyetel laju proses, lebar
+# input dan model_complexity dalam batas CV_ADAPT supaya mendekati target.
+# Terlalu lambat: turunkan lebar dulu, lalu complexity, lalu laju proses.
+# Ada sisa waktu: kembalikan dengan urutan terbalik. Setiap keputusan
+# dicatat ke telemetry.
+CV_ADAPT = {
+    'enabled': True,
+    'target_ms': 25.0,
+    'interval': (0.033, 0.1),
+    'width': (160, 320),
+    'complexity': (0, 1),
+    'width_step': 32,
+    'hold_frames': 20, # Minimal frame antar perubahan (histeresis)
+}
+
+class AdaptiveCvController:
+    def __init__(self, config=CV_ADAPT):
+        self.config = config
+        self.interval = CV_INTERVAL
+        self.width = config['width'][1]
+        self.complexity = config['complexity'][1]
+        self.ema_ms = None
+        self.frames = 0
+        self.last_change = 0
+
+    def observe(self, infer_ms):
+        self.ema_ms = infer_ms if self.ema_ms is None else self.ema_ms + (infer_ms - self.ema_ms) * 0.2
+        self.frames += 1
+        telemetry.gauge('cv_infer_ms', round(self.ema_ms, 2))
+        cfg = self.config
+        if not cfg['enabled'] or self.frames - self.last_change < cfg['hold_frames']:
+            return
+        # Inference lebih lama dari interval proses = pasti tertinggal
+        target = min(cfg['target_ms'], self.interval * 1000.0)
+        if self.ema_ms > target * 1.2:
+            self._degrade()
+        elif self.ema_ms < target * 0.6:
+            self._upgrade()
+
+    def _set(self, name, value):
+        old = getattr(self, name)
+        if value == old:
+            return False
+        setattr(self, name, value)
+        self.last_change = self.frames
+        telemetry.event('cv_adapt', param=name, old=old, new=value, infer_ms=round(self.ema_ms, 2))
+        telemetry.gauge('cv_' + name, value)
+        return True
+
+    def _degrade(self):
+        cfg = self.config
+        (self._set('width', max(cfg['width'][0], self.width - cfg['width_step']))
+         or self._set('complexity', max(cfg['complexity'][0], self.complexity - 1))
+         or self._set('interval', min(cfg['interval'][1], round(self.interval * 1.25, 4))))
+
+    def _upgrade(self):
+        cfg = self.config
+        (self._set('interval', max(cfg['interval'][0], round(self.interval / 1.25, 4)))
+         or self._set('complexity', min(cfg['complexity'][1], self.complexity + 1))
+         or self._set('width', min(cfg['width'][1], self.width + cfg['width_step'])))
+
+cv_controller = AdaptiveCvController()
+
+class CaptureStats:
+    """Counter pipeline kamera: frame di-grab, diproses, dan dibuang tanpa decode."""
+    def __init__(self):
+        self.grabbed = 0
+        self.processed = 0
+        self.dropped = 0
+        self.failures = 0
+        self.last_capture_ts = 0.0
+        self.last_process_ts = 0.0
+
+capture_stats = CaptureStats()
+
+class FrameBuffers:
+    """Ring slot frame kamera + buffer tujuan resize/cvtColor yang dipakai ulang.
+
+    Setelah warm-up tidak ada alokasi array per frame: retrieve, resize dan
+    cvtColor semua menulis ke buffer yang sudah ada lewat dst=. Buffer
+    disimpan per shape, jadi berpindah antara frame penuh dan crop ROI (yang
+    ukurannya dikuantisasi) juga tidak mengalokasi ulang.
+    """
+    MAX_SHAPES = 16
+
+    def __init__(self, slots=3):
+        self.slots = [None] * slots
+        self.index = 0
+        self.small = {} # shape -> buffer hasil resize
+        self.rgb = {}   # shape -> buffer hasil cvtColor
+        self.allocs = 0  # Buffer baru dialokasikan (harus berhenti naik setelah warm-up)
+        self.reused = 0  # Frame yang diproses tanpa alokasi sama sekali
+        self.allocs_at_frame = 0
+
+    def retrieve(self, cap):
+        self.allocs_at_frame = self.allocs
+        slot = self.slots[self.index]
+        success, frame = cap.retrieve(slot)
+        if success:
+            if frame is not slot:
+                self.slots[self.index] = frame
+                self.allocs += 1
+            self.index = (self.index + 1) % len(self.slots)
+        return success, frame
+
+    def _buffer(self, cache, shape):
+        buf = cache.get(shape)
+        if buf is None:
+            if len(cache) >= self.MAX_SHAPES:
+                cache.clear()
+            buf = cache[shape] = np.empty(shape, np.uint8)
+            self.allocs += 1
+        return buf
+
+    def to_rgb(self, frame, target_w):
+        h, w = frame.shape[:2]
+        if w != target_w:
+            target_h = max(1, int(h * (target_w / float(w))))
+            small = self._buffer(self.small, (target_h, target_w, 3))
+            cv2.resize(frame, (target_w, target_h), dst=small)
+            frame = small
+        rgb = self._buffer(self.rgb, frame.shape)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb)
+        if self.allocs == self.allocs_at_frame:
+            self.reused += 1
+        return rgb
+
+frame_buffers = FrameBuffers()
+
+# --- Fitur Gestur ---
+PINCH_THRESHOLD = 0.05 # Jarak jempol-telunjuk (fraksi frame) untuk menembak
+
+NO_HAND = {
     'pinch_distance': None,
     'index_folded': False,
     'middle_folded': False,
-    'hand_present': False 
+    'hand_present': False,
 }
 
+# Landmark dikonversi sekali per frame ke array (21, 3); semua fitur dihitung
+# dalam satu pass NumPy dan juga jalan untuk batch (N, 21, 3) saat evaluasi
+# offline. Jarak memakai x,y saja; z dari MediaPipe diabaikan.
+WRIST = 0
+MIDDLE_MCP = 9
+FINGER_NAMES = ('thumb', 'index', 'middle', 'ring', 'pinky')
+FINGER_TIPS = np.array([4, 8, 12, 16, 20])
+FINGER_BASES = np.array([2, 5, 9, 13, 17]) # MCP tiap jari
+
+def landmarks_to_array(hand_landmarks):
+    """Landmark MediaPipe -> array (21, 3) float64. Array diteruskan apa adanya."""
+    if isinstance(hand_landmarks, np.ndarray):
+        return hand_landmarks
+    return np.array([(p.x, p.y, p.z) for p in hand_landmarks.landmark], np.float64)
+
+def hand_features(lm):
+    """Fitur gestur untuk (21, 3) atau (N, 21, 3) sekaligus.
+
+    folded: (..., 5) per jari (ujung lebih dekat ke pergelangan dari MCP).
+    pinch_norm: pinch dibagi skala telapak (pergelangan -> MCP tengah).
+    orientation_deg: arah telapak di layar (sudah di-mirror), 0 = jari ke
+    atas, positif = miring ke kanan.
+    """
+    xy = np.asarray(lm, np.float64)[..., :2]
+    wrist = xy[..., WRIST, None, :]
+    tip_d = np.linalg.norm(xy[..., FINGER_TIPS, :] - wrist, axis=-1)
+    base_d = np.linalg.norm(xy[..., FINGER_BASES, :] - wrist, axis=-1)
+    pinch = np.linalg.norm(xy[..., 4, :] - xy[..., 8, :], axis=-1)
+    palm_vec = xy[..., MIDDLE_MCP, :] - xy[..., WRIST, :]
+    palm = np.linalg.norm(palm_vec, axis=-1)
+    raw_x = 1.0 - xy[..., 8, 0] # Mirror (pengganti cv2.flip)
+    return {
+        'index_x_frac': np.clip((raw_x - 0.1) / 0.8, 0.0, 1.0),
+        'index_y_frac': xy[..., 8, 1],
+        'pinch_distance': pinch,
+        'pinch_norm': pinch / np.maximum(palm, 1e-6),
+        'folded': tip_d < base_d,
+        'palm_scale': palm,
+        'orientation_deg': np.degrees(np.arctan2(-palm_vec[..., 0], -palm_vec[..., 1])),
+    }
+
+def extract_hand_features(hand_landmarks):
+    """Landmark (objek MediaPipe atau array) -> field CvSnapshot (posisi telunjuk, pinch, jari terlipat)."""
+    f = hand_features(landmarks_to_array(hand_landmarks))
+    folded = f['folded']
+    return {
+        'index_x_frac': float(f['index_x_frac']),
+        'index_y_frac': float(f['index_y_frac']),
+        'pinch_distance': float(f['pinch_distance']),
+        'index_folded': bool(folded[1]),
+        'middle_folded': bool(folded[2]),
+        'hand_present': True,
+    }
+
+def classify_gesture(features):
+    """Gestur yang dipakai loop game untuk satu frame (urutan prioritas sama)."""
+    if not features['hand_present']:
+        return "TANGAN TIDAK TERDETEKSI"
+    pinch = features['pinch_distance']
+    if pinch is not None and pinch < PINCH_THRESHOLD:
+        return "TEMBAK"
+    if features['index_folded'] and features['middle_folded']:
+        return "ULTI"
+    return "BERGERAK"
+
+# --- Hand Slots (co-op) ---
+# Dua tangan dari satu pass inference dipasangkan ke slot pemain. Slot yang
+# baru saja terlihat dicocokkan dengan posisi terakhirnya (kontinuitas), plus
+# penalti kalau label handedness berganti; slot kosong memakai posisi awal
+# (P1 kiri layar, P2 kanan). Kombinasi dengan biaya total terkecil menang.
+class HandSlots:
+    def __init__(self, n=2, memory=1.0, label_penalty=0.3):
+        self.n = n
+        self.memory = memory # Detik slot masih "ingat" posisi tangannya
+        self.label_penalty = label_penalty
+        self.prior = [((i + 0.5) / n, 0.5) for i in range(n)]
+        self.reset()
+
+    def reset(self):
+        self.pos = [None] * self.n
+        self.label = [None] * self.n
+        self.seen = [0.0] * self.n
+
+    def _cost(self, slot, point, label, now):
+        recent = self.pos[slot] is not None and now - self.seen[slot] < self.memory
+        ref = self.pos[slot] if recent else self.prior[slot]
+        cost = math.hypot(point[0] - ref[0], point[1] - ref[1])
+        if recent and label and self.label[slot] and label != self.label[slot]:
+            cost += self.label_penalty
+        return cost
+
+    def assign(self, hands, now):
+        """hands: list (landmark, features, label) -> list per slot (item hands atau None)."""
+        slots = [None] * self.n
+        hands = hands[:self.n]
+        if not hands:
+            return slots
+        points = [(f['index_x_frac'], f['index_y_frac']) for _, f, _ in hands]
+        best = min(itertools.permutations(range(self.n), len(hands)),
+                   key=lambda perm: sum(self._cost(slot, points[i], hands[i][2], now) for i, slot in enumerate(perm)))
+        for i, slot in enumerate(best):
+            slots[slot] = hands[i]
+            self.pos[slot] = points[i]
+            self.label[slot] = hands[i][2]
+            self.seen[slot] = now
+        return slots
+
+hand_slots = HandSlots()
+
+GESTURES = ("TANGAN TIDAK TERDETEKSI", "TEMBAK", "ULTI", "BERGERAK")
+
+def classify_gestures(features, present):
+    """Versi batch classify_gesture: indeks ke GESTURES per frame."""
+    folded = features['folded']
+    return np.select([~present, features['pinch_distance'] < PINCH_THRESHOLD, folded[..., 1] & folded[..., 2]],
+                     [0, 1, 2], 3)
+
+# --- ROI Tracking ---
+# Tangan biasanya hanya mengisi sebagian kecil frame. Selama tangan terlacak,
+# frame berikutnya di-crop persegi di sekitar bounding box landmark terakhir
+# (plus margin) sebelum di-resize ke lebar input, jadi detail tangan lebih
+# tinggi untuk biaya inference yang sama (atau biaya lebih kecil dengan
+# 'width' yang lebih kecil). Tangan hilang -> frame penuh lagi. Landmark
+# hasil crop dipetakan balik ke fraksi frame penuh sebelum ekstraksi fitur.
+#
+# Crop tidak pernah di-upscale: lebar input dibatasi sisi crop, dan sisi crop
+# dikuantisasi ke kelipatan 'step' supaya shape input berasal dari himpunan
+# kecil (buffer FrameBuffers dipakai ulang). MediaPipe berjalan dalam mode
+# tracking, yang memakai posisi landmark frame sebelumnya dalam koordinat
+# gambar input; karena itu crop dibuat "lengket": selama bbox baru masih di
+# dalam crop sebelumnya (dikurangi 'hold' di tiap sisi) dan ukurannya sama,
+# crop tidak digeser. Kalau crop tetap bergeser, tracking MediaPipe cukup
+# kehilangan hint posisinya dan jatuh kembali ke deteksi telapak.
+ROI_CONFIG = {
+    'enabled': True,
+    'margin': 0.4,    # Margin tiap sisi, relatif ke sisi bbox
+    'min_side': 0.35, # Sisi crop minimal, relatif ke sisi pendek frame
+    'step': 32,       # Sisi crop dibulatkan ke atas ke kelipatan ini (piksel)
+    'hold': 0.1,      # Crop lama dipakai ulang selama bbox >= hold*sisi dari tepinya
+    'width': None,    # Lebar input crop; None = ikuti controller adaptif
+}
+
+def hand_bbox(lm):
+    lo = lm[:, :2].min(axis=0)
+    hi = lm[:, :2].max(axis=0)
+    return float(lo[0]), float(lo[1]), float(hi[0]), float(hi[1])
+
+def roi_rect(bbox, frame_w, frame_h, config=ROI_CONFIG, prev=None):
+    """bbox (fraksi frame penuh) -> crop persegi (x, y, sisi, sisi) dalam piksel."""
+    x0, y0, x1, y1 = bbox
+    side = max((x1 - x0) * frame_w, (y1 - y0) * frame_h) * (1.0 + 2.0 * config['margin'])
+    side = max(side, config['min_side'] * min(frame_w, frame_h))
+    step = config['step']
+    side = int(min(-(-side // step) * step, frame_w, frame_h))
+    if prev is not None and prev[2] == side:
+        px, py, _, _ = prev
+        hold = side * config['hold']
+        if (x0 * frame_w >= px + hold and x1 * frame_w <= px + side - hold and
+                y0 * frame_h >= py + hold and y1 * frame_h <= py + side - hold):
+            return prev
+    x = int(min(max((x0 + x1) * 0.5 * frame_w - side * 0.5, 0), frame_w - side))
+    y = int(min(max((y0 + y1) * 0.5 * frame_h - side * 0.5, 0), frame_h - side))
+    return x, y, side, side
+
+def remap_landmarks(lm, roi):
+    """Landmark (21, 3) relatif crop -> fraksi frame penuh (in-place). roi = (ox, oy, sx, sy) dalam fraksi."""
+    ox, oy, sx, sy = roi
+    lm[:, 0] = ox + lm[:, 0] * sx
+    lm[:, 1] = oy + lm[:, 1] * sy
+    lm[:, 2] *= sx
+
+def crop_for_roi(image, bbox, prev=None):
+    """Crop frame untuk bbox terakhir -> (view, roi fraksi, rect piksel) atau (image, None, None)."""
+    if bbox is None or not ROI_CONFIG['enabled']:
+        return image, None, None
+    frame_h, frame_w = image.shape[:2]
+    rect = x, y, w, h = roi_rect(bbox, frame_w, frame_h, prev=prev)
+    return image[y:y + h, x:x + w], (x / frame_w, y / frame_h, w / frame_w, h / frame_h), rect
+
+# --- Landmark Recording ---
+# Stream landmark hasil CV (21 titik x,y,z dalam fraksi frame penuh + waktu
+# capture) disimpan kolumnar ke .npz: t (detik sejak frame pertama), seq,
+# present, infer_ms, landmarks (N, 21, 3; NaN saat tangan tidak ada).
+# LandmarkPlayback memutar file itu sebagai sumber frame yang sekaligus
+# menggantikan hands.process, jadi logika gestur bisa diuji ulang persis
+# tanpa kamera/inference. Rekam hanya di mode thread (worker tidak
+# mengirim landmark mentah ke proses game).
+#
+# Chunk yang penuh langsung ditulis thread background sebagai part bernomor
+# (<nama>.partNNNNN.npz), jadi memori tetap kecil di sesi panjang dan crash
+# hanya kehilangan chunk terakhir. close() yang bersih menggabungkan semua
+# part ke satu .npz; kalau part masih tertinggal (proses mati), playback
+# menggabungkannya saat dimuat.
+LANDMARK_COUNT = 21
+LandmarkResults = namedtuple('LandmarkResults', ('multi_hand_landmarks',))
+LANDMARK_COLUMNS = ('t', 'seq', 'present', 'infer_ms', 'landmarks')
+
+def landmark_part_paths(path):
+    import glob
+    stem = path[:-4] if path.endswith('.npz') else path
+    return sorted(glob.glob(glob.escape(stem) + '.part[0-9]*.npz'))
+
+def load_landmark_columns(path):
+    """Kolom rekaman landmark dari .npz hasil close(), atau gabungan part-nya."""
+    paths = [path] if os.path.exists(path) else landmark_part_paths(path)
+    if not paths:
+        raise FileNotFoundError(path)
+    parts = []
+    for p in paths:
+        with np.load(p) as data:
+            parts.append({key: data[key] for key in LANDMARK_COLUMNS})
+    cols = {key: np.concatenate([part[key] for part in parts]) for key in LANDMARK_COLUMNS}
+    if len(cols['t']):
+        cols['t'] = cols['t'] - cols['t'][0]
+    return cols
+
+class LandmarkRecorder:
+    CHUNK = 1024
+
+    def __init__(self, path):
+        self.path = path
+        self.stem = path[:-4] if path.endswith('.npz') else path
+        self.chunk = None
+        self.free = [] # Chunk yang sudah ditulis, dipakai ulang
+        self.rows = self.CHUNK # Paksa alokasi chunk pertama
+        self.count = 0
+        self.parts = 0
+        self.t0 = None
+        self.queue = queue.Queue()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.writer = threading.Thread(target=self._write_loop, daemon=True)
+        self.writer.start()
+
+    def _new_chunk(self):
+        if self.chunk is not None:
+            self._submit(self.CHUNK)
+        n = self.CHUNK
+        self.chunk = self.free.pop() if self.free else {
+            't': np.empty(n, np.float64),
+            'seq': np.empty(n, np.int64),
+            'present': np.empty(n, np.bool_),
+            'infer_ms': np.empty(n, np.float32),
+            'landmarks': np.empty((n, LANDMARK_COUNT, 3), np.float32),
+        }
+        self.rows = 0
+
+    def _submit(self, rows):
+        path = f"{self.stem}.part{self.parts:05d}.npz"
+        self.parts += 1
+        self.queue.put((path, self.chunk, rows))
+        self.chunk = None
+
+    def _write_loop(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                break
+            path, chunk, rows = job
+            tmp = self.stem + '.writing.npz'
+            np.savez(tmp, **{key: arr[:rows] for key, arr in chunk.items()})
+            os.replace(tmp, path) # Part selalu utuh atau tidak ada
+            self.free.append(chunk)
+
+    def append(self, seq, capture_ts, hand, infer_ms):
+        if self.rows == self.CHUNK:
+            self._new_chunk()
+        c, i = self.chunk, self.rows
+        c['t'][i] = capture_ts
+        c['seq'][i] = seq
+        c['infer_ms'][i] = infer_ms
+        c['present'][i] = hand is not None
+        if hand is not None:
+            c['landmarks'][i] = hand
+        else:
+            c['landmarks'][i] = np.nan
+        self.rows += 1
+        self.count += 1
+
+    def close(self):
+        if self.chunk is not None and self.rows:
+            self._submit(self.rows)
+        self.queue.put(None)
+        self.writer.join()
+        if not self.count:
+            return None
+        # Gabungkan part ke satu file terkompresi, lalu hapus part-nya
+        parts = landmark_part_paths(self.path)
+        cols = {key: [] for key in LANDMARK_COLUMNS}
+        for p in parts:
+            with np.load(p) as data:
+                for key in LANDMARK_COLUMNS:
+                    cols[key].append(data[key])
+        cols = {key: np.concatenate(arrs) for key, arrs in cols.items()}
+        cols['t'] -= cols['t'][0]
+        np.savez_compressed(self.path, **cols)
+        for p in parts:
+            os.remove(p)
+        print(f"[landmarks] {self.count} frame ditulis ke {self.path}")
+        return self.path
+
+landmark_recorder = None
+
+class LandmarkPlayback:
+    """Sumber frame (ala FrameSource) dari rekaman landmark; results() menggantikan hands.process."""
+    eof = False
+
+    def __init__(self, path, realtime=True, loop=False):
+        cols = load_landmark_columns(path)
+        self.t = cols['t']
+        self.present = cols['present']
+        self.landmarks = cols['landmarks']
+        self.realtime = realtime
+        self.loop = loop
+        self.index = -1
+        self.t_start = None
+
+    def __len__(self):
+        return len(self.t)
+
+    def isOpened(self):
+        return len(self.t) > 0
+
+    def release(self):
+        pass
+
+    def grab(self):
+        n = self.index + 1
+        if n >= len(self.t):
+            if not self.loop or not len(self.t):
+                self.eof = True
+                return False
+            n, self.t_start = 0, None
+        if self.realtime:
+            now = time.perf_counter()
+            if self.t_start is None:
+                self.t_start = now - self.t[n]
+            due = self.t_start + self.t[n]
+            if due > now:
+                time.sleep(due - now)
+        self.index = n
+        return True
+
+    def results_at(self, i):
+        if not self.present[i]:
+            return LandmarkResults(None)
+        return LandmarkResults([self.landmarks[i].astype(np.float64)])
+
+    def results(self):
+        return self.results_at(self.index)
+
+# --- CV Worker Process (opsional) ---
+# Inference MediaPipe + post-processing landmark dipindah ke proses lain agar
+# tidak berebut GIL dengan loop pygame. Frame RGB dikirim lewat shared memory
+# (ring CV_SHM_SLOTS slot), pesan kecil (slot, ukuran, seq) lewat Pipe. Hasil
+# balik lewat struct shared memory dengan seqlock (termasuk bbox landmark
+# untuk crop ROI berikutnya): writer menaikkan seq ke
+# ganjil, menulis payload, lalu ke genap; reader mengulang kalau seq ganjil
+# atau berubah selama membaca. Tidak ada lock di sisi game.
+CV_SHM_SLOTS = 3
+CV_SHM_MAX_SHAPE = (480, 640, 3)
+CV_SEQ = struct.Struct('<Q')
+CV_PAYLOAD = struct.Struct('<QddddBBBddddddd') # frame_seq, capture_ts, x, y, pinch, fold idx, fold mid, present, infer_ms, bbox, preprocess_ms, publish_ts
+
+def seqlock_write(buf, seq, *payload):
+    CV_SEQ.pack_into(buf, 0, seq + 1)
+    CV_PAYLOAD.pack_into(buf, CV_SEQ.size, *payload)
+    CV_SEQ.pack_into(buf, 0, seq + 2)
+    return seq + 2
+
+def seqlock_read(buf, retries=100):
+    for _ in range(retries):
+        seq = CV_SEQ.unpack_from(buf, 0)[0]
+        if seq & 1:
+            continue
+        payload = CV_PAYLOAD.unpack_from(buf, CV_SEQ.size)
+        if CV_SEQ.unpack_from(buf, 0)[0] == seq:
+            return seq, payload
+    return None, None
+
+def cv_worker_main(frames_name, result_name, conn, model_complexity):
+    from multiprocessing import shared_memory
+    frames = shared_memory.SharedMemory(name=frames_name)
+    result = shared_memory.SharedMemory(name=result_name)
+    slot_bytes = int(np.prod(CV_SHM_MAX_SHAPE))
+    worker_hands = create_hands(model_complexity)
+    seq = 0
+    last_x, last_y = 0.5, 0.5
+    rgb = None
+    try:
+        while True:
+            msg = conn.recv()
+            if msg is None:
+                break
+            slot, h, w, frame_seq, capture_ts, complexity, roi, preprocess_ms = msg
+            if complexity != model_complexity:
+                # Diminta controller adaptif di proses game
+                worker_hands.close()
+                worker_hands = create_hands(complexity)
+                model_complexity = complexity
+            rgb = np.ndarray((h, w, 3), np.uint8, buffer=frames.buf, offset=slot * slot_bytes)
+            t0 = time.perf_counter()
+            try:
+                results = worker_hands.process(rgb)
+            except Exception:
+                results = None
+            infer_ms = (time.perf_counter() - t0) * 1000.0
+
+            if results and results.multi_hand_landmarks:
+                hand = landmarks_to_array(results.multi_hand_landmarks[0])
+                if roi is not None:
+                    remap_landmarks(hand, roi)
+                f = extract_hand_features(hand)
+                last_x, last_y = f['index_x_frac'], f['index_y_frac']
+                seq = seqlock_write(result.buf, seq, frame_seq, capture_ts, last_x, last_y,
+                                    f['pinch_distance'], f['index_folded'], f['middle_folded'], True, infer_ms,
+                                    *hand_bbox(hand), preprocess_ms, time.perf_counter())
+            else:
+                seq = seqlock_write(result.buf, seq, frame_seq, capture_ts, last_x, last_y,
+                                    math.nan, False, False, False, infer_ms, math.nan, math.nan, math.nan, math.nan,
+                                    preprocess_ms, time.perf_counter())
+    finally:
+        worker_hands.close()
+        rgb = None # Lepas view sebelum shared memory ditutup
+        frames.close()
+        result.close()
+
+class CvWorkerClient:
+    """Sisi game dari CV worker: kirim frame ke shared memory, baca snapshot hasil."""
+    def __init__(self, model_complexity=1):
+        import multiprocessing
+        from multiprocessing import shared_memory
+        self.slot_bytes = int(np.prod(CV_SHM_MAX_SHAPE))
+        self.frames = shared_memory.SharedMemory(create=True, size=self.slot_bytes * CV_SHM_SLOTS)
+        self.result = shared_memory.SharedMemory(create=True, size=CV_SEQ.size + CV_PAYLOAD.size)
+        self.result.buf[:] = bytes(len(self.result.buf))
+        self.slot = 0
+        self.sent_seq = 0
+        self.observed_seq = 0
+        self.busy_skips = 0
+        ctx = multiprocessing.get_context('spawn')
+        child_conn, self.conn = ctx.Pipe(duplex=False)
+        self.process = ctx.Process(target=cv_worker_main, daemon=True,
+                                   args=(self.frames.name, self.result.name, child_conn, model_complexity))
+        self.process.start()
+        child_conn.close()
+
+    def last_bbox(self):
+        """Bbox landmark dari hasil terakhir worker (None jika tangan hilang)."""
+        seq, payload = seqlock_read(self.result.buf)
+        if payload is None or not payload[7]:
+            return None
+        return payload[9:13]
+
+    def submit(self, rgb, frame_seq, capture_ts, complexity, roi=None, preprocess_ms=0.0):
+        # Worker masih memproses frame sebelumnya -> lewati, jangan menumpuk antrian
+        seq, payload = seqlock_read(self.result.buf)
+        if payload is not None and payload[0] > self.observed_seq:
+            self.observed_seq = payload[0]
+            cv_controller.observe(payload[8])
+        if self.sent_seq and (payload is None or payload[0] < self.sent_seq):
+            self.busy_skips += 1
+            return False
+        h, w = rgb.shape[:2]
+        view = np.ndarray((h, w, 3), np.uint8, buffer=self.frames.buf, offset=self.slot * self.slot_bytes)
+        np.copyto(view, rgb)
+        self.conn.send((self.slot, h, w, frame_seq, capture_ts, complexity, roi, preprocess_ms))
+        self.slot = (self.slot + 1) % CV_SHM_SLOTS
+        self.sent_seq = frame_seq
+        return True
+
+    def snapshot(self):
+        seq, payload = seqlock_read(self.result.buf)
+        if payload is None or seq == 0:
+            return latest_cv
+        frame_seq, capture_ts, x, y, pinch, idx_fold, mid_fold, present, infer_ms = payload[:9]
+        preprocess_ms, publish_ts = payload[13:15]
+        return CvSnapshot(frame_seq, capture_ts, publish_ts, x, y,
+                          None if math.isnan(pinch) else pinch,
+                          bool(idx_fold), bool(mid_fold), bool(present), infer_ms, None, preprocess_ms)
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=2.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.frames.close()
+        self.frames.unlink()
+        self.result.close()
+        self.result.unlink()
+
+cv_worker = None
+
 def camera_thread_loop():
-    global latest_cv
-    last_process = 0.0
-    while cv_running.is_set():
-        success, image = cap.read()
-        if not success:
-            time.sleep(0.05)
+    global latest_cv, latest_players
+    stats = capture_stats
+    ctrl = cv_controller
+    hand_slots.reset()
+    bbox = None # Bbox landmark terakhir (fraksi frame penuh) untuk crop ROI
+    roi_px = None # Crop ROI sebelumnya (piksel), dipakai ulang selama tangan masih di dalamnya
+    playback = isinstance(cap, LandmarkPlayback)
+    next_due = time.perf_counter()
+    while not cv_stop.is_set():
+        # grab() memblok sampai device punya frame baru -> dipacing oleh kamera,
+        # tanpa polling/sleep. Decode (retrieve) hanya untuk frame yang jatuh tempo.
+        if not cap.grab():
+            if getattr(cap, 'eof', False):
+                break # Sumber offline habis
+            stats.failures += 1
+            cv_stop.wait(0.05)
             continue
-        
-        image = cv2.flip(image, 1)
-        now = time.time()
-        
-        if now - last_process < 0.05:
-            time.sleep(0.01)
+        capture_ts = time.perf_counter()
+        stats.grabbed += 1
+        stats.last_capture_ts = capture_ts
+
+        if capture_ts < next_due and not playback:
+            stats.dropped += 1
             continue
-            
-        last_process = now
 
-        try:
-            h, w = image.shape[:2]
-            target_w = 320
-            target_h = max(1, int(h * (target_w / float(w))))
-            small = cv2.resize(image, (target_w, target_h))
-            image_rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
-            results = hands.process(image_rgb)
-        except Exception:
-            results = None
-
-        with cv_lock:
-            latest_cv['results'] = results
-            if results and results.multi_hand_landmarks:
-                hand_landmarks = results.multi_hand_landmarks[0]
-                thumb_tip = hand_landmarks.landmark[mp_hands.HandLandmark.THUMB_TIP]
-                index_tip = hand_landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_TIP]
-                middle_tip = hand_landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_TIP]
-                wrist = hand_landmarks.landmark[mp_hands.HandLandmark.WRIST]
-                
-                raw_x = index_tip.x 
-                raw_y = index_tip.y 
-                clamped_x = max(0.0, min(1.0, (raw_x - 0.1) / 0.8))
-                
-                latest_cv['index_x_frac'] = clamped_x
-                latest_cv['index_y_frac'] = raw_y
-                
-                latest_cv['pinch_distance'] = get_distance(thumb_tip, index_tip)
-                latest_cv['index_folded'] = get_distance(index_tip, wrist) < get_distance(hand_landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_MCP], wrist)
-                latest_cv['middle_folded'] = get_distance(middle_tip, wrist) < get_distance(hand_landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_MCP], wrist)
-                latest_cv['hand_present'] = True 
+        # Jadwal fixed-rate; kalau tertinggal jauh, mulai lagi dari sekarang
+        next_due += ctrl.interval
+        if next_due < capture_ts:
+            next_due = capture_ts + ctrl.interval
+
+        if playback:
+            # Rekaman landmark menggantikan decode + preprocess + hands.process
+            stats.processed += 1
+            results, roi, t0, preprocess_ms = cap.results(), None, capture_ts, 0.0
+            now = time.perf_counter()
+        else:
+            success, image = frame_buffers.retrieve(cap)
+            if not success:
+                stats.failures += 1
+                continue
+            stats.processed += 1
+
+            # Tidak ada cv2.flip: frame diproses apa adanya dan koordinat x
+            # landmark yang di-mirror (1 - x), jadi hasilnya sama seperti kaca.
+            target_w = min(ctrl.width, image.shape[1])
+            if cv_worker is not None:
+                bbox = cv_worker.last_bbox()
+            crop, roi, roi_px = crop_for_roi(image, bbox, roi_px)
+            if roi is not None:
+                # Tidak pernah upscale: crop kecil diproses di resolusi aslinya
+                target_w = min(ROI_CONFIG['width'] or ctrl.width, ctrl.width, crop.shape[1])
+                telemetry.count('cv_roi_frames')
+            else:
+                telemetry.count('cv_full_frames')
+
+            if cv_worker is not None:
+                image_rgb = frame_buffers.to_rgb(crop, target_w)
+                preprocess_ms = (time.perf_counter() - capture_ts) * 1000.0
+                cv_worker.submit(image_rgb, stats.processed, capture_ts, ctrl.complexity, roi, preprocess_ms)
+                stats.last_process_ts = time.perf_counter()
+                continue
+
+            tracker.set_complexity(ctrl.complexity)
+            image_rgb = frame_buffers.to_rgb(crop, target_w)
+            t0 = time.perf_counter()
+            preprocess_ms = (t0 - capture_ts) * 1000.0
+            try:
+                results = tracker.process(image_rgb)
+            except Exception:
+                results = None
+            now = time.perf_counter()
+            ctrl.observe((now - t0) * 1000.0)
+
+        found = []
+        if results and results.multi_hand_landmarks:
+            labels = getattr(results, 'multi_handedness', None)
+            for i, h in enumerate(results.multi_hand_landmarks[:CV_HANDS]):
+                lm = landmarks_to_array(h)
+                if roi is not None:
+                    remap_landmarks(lm, roi)
+                label = labels[i].classification[0].label if labels else None
+                found.append((lm, extract_hand_features(lm), label))
+        slots = hand_slots.assign(found, capture_ts) if CV_HANDS > 1 else (found or [None])[:1]
+
+        snaps = []
+        for slot, item in enumerate(slots):
+            if item is not None:
+                features = item[1]
             else:
-                latest_cv['pinch_distance'] = None
-                latest_cv['index_folded'] = False
-                latest_cv['middle_folded'] = False
-                latest_cv['hand_present'] = False 
+                # Posisi kursor terakhir dipertahankan saat tangan hilang
+                prev = latest_players[slot]
+                features = dict(NO_HAND, index_x_frac=prev.index_x_frac, index_y_frac=prev.index_y_frac)
+            snaps.append(CvSnapshot(seq=stats.processed, capture_ts=capture_ts, publish_ts=now,
+                                    infer_ms=(now - t0) * 1000.0, results=results if slot == 0 else None,
+                                    preprocess_ms=preprocess_ms, **features))
+
+        hand = slots[0][0] if slots[0] is not None else None
+        if all(item is not None for item in slots):
+            # Co-op: crop harus memuat semua tangan; kalau ada yang hilang, frame penuh
+            boxes = [hand_bbox(item[0]) for item in slots]
+            bbox = (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                    max(b[2] for b in boxes), max(b[3] for b in boxes))
+        else:
+            if roi is not None:
+                telemetry.count('cv_roi_lost')
+            bbox = None
+        if landmark_recorder is not None:
+            landmark_recorder.append(stats.processed, capture_ts, hand, (now - t0) * 1000.0)
 
-camera_thread = None
+        stats.last_process_ts = now
+        latest_players = tuple(snaps) + latest_players[len(snaps):]
+        latest_cv = snaps[0]
 
-# --- Inisialisasi Pygame ---
-pygame.init()
-pygame.mixer.init()
+camera_thread = None
 
 # --- Konstanta ---
 WIDTH, HEIGHT = 960, 720 
@@ -141,6 +1251,1238 @@ SILVER = (192, 192, 192)
 BRONZE = (205, 127, 50)
 UI_BG = (20, 20, 40, 220) 
 
+# --- Hardware Profiles ---
+# Konstanta yang paling menentukan beban CPU dikumpulkan per profil. Profil
+# dipilih sekali (kalibrasi singkat saat pertama kali jalan, atau --profile)
+# lalu disimpan di settings.json. 'medium' = nilai lama dan selalu dipakai
+# untuk headless/benchmark supaya hasil simulasi tetap bisa dibandingkan.
+# FPS sengaja TIDAK ikut profil: gerak & tembakan musuh dihitung per frame,
+# jadi FPS lain = kecepatan dan kesulitan game lain.
+HARDWARE_PROFILES = {
+    'low': {
+        'cv_interval': 0.1, 'target_w': 192, 'model_complexity': 0,
+        'particle_rate': 0.4, 'enemy_cap_base': 3, 'enemy_cap_waves': 3,
+    },
+    'medium': {
+        'cv_interval': 0.05, 'target_w': 320, 'model_complexity': 1,
+        'particle_rate': 1.0, 'enemy_cap_base': 4, 'enemy_cap_waves': 2,
+    },
+    'high': {
+        'cv_interval': 0.033, 'target_w': 320, 'model_complexity': 1,
+        'particle_rate': 1.0, 'enemy_cap_base': 4, 'enemy_cap_waves': 2,
+    },
+}
+PROFILE_NAMES = ('low', 'medium', 'high') # Urutan juga dipakai di header replay
+SETTINGS_FILE = os.path.join(game_folder, "settings.json")
+PARTICLE_RATE = 1.0
+active_profile = {'name': 'medium', 'source': 'default'}
+
+def load_settings():
+    import json
+    try:
+        with open(SETTINGS_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_settings(settings):
+    import json
+    tmp = SETTINGS_FILE + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(settings, f, indent=2)
+    os.replace(tmp, SETTINGS_FILE)
+
+def apply_profile(name, source='default'):
+    global PARTICLE_RATE
+    prof = HARDWARE_PROFILES[name]
+    PARTICLE_RATE = prof['particle_rate']
+    # Profil = titik awal + batas atas controller CV adaptif
+    lo_w, _ = CV_ADAPT['width']
+    cv_controller.config = dict(CV_ADAPT,
+                                width=(min(lo_w, prof['target_w']), prof['target_w']),
+                                complexity=(0, prof['model_complexity']),
+                                interval=(min(CV_ADAPT['interval'][0], prof['cv_interval']),
+                                          max(CV_ADAPT['interval'][1], prof['cv_interval'])))
+    cv_controller.interval = prof['cv_interval']
+    cv_controller.width = prof['target_w']
+    cv_controller.complexity = prof['model_complexity']
+    cv_controller.ema_ms = None
+    cv_controller.last_change = cv_controller.frames
+    active_profile.update(prof, name=name, source=source)
+
+def enemy_cap(wave):
+    return active_profile['enemy_cap_base'] + wave // active_profile['enemy_cap_waves']
+
+def calibrate_hardware(frames=40):
+    """Ukur render, collision dan beberapa frame inference, lalu pilih profil."""
+    r = random.Random(0) # Tidak menyentuh stream RNG game
+    surf = pygame.Surface((WIDTH, HEIGHT))
+    sprite_img = pygame.Surface((32, 32))
+    sprite_img.fill(RED)
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        surf.fill(BLACK)
+        for _ in range(300):
+            surf.blit(sprite_img, (r.randint(0, WIDTH), r.randint(0, HEIGHT)))
+        for _ in range(200):
+            pygame.draw.circle(surf, YELLOW, (r.randint(0, WIDTH), r.randint(0, HEIGHT)), 3)
+    render_ms = (time.perf_counter() - t0) * 1000.0 / frames
+
+    def group(n, size):
+        g = pygame.sprite.Group()
+        for _ in range(n):
+            sp = pygame.sprite.Sprite()
+            sp.rect = pygame.Rect(r.randint(0, WIDTH), r.randint(0, HEIGHT), size, size)
+            sp.radius = size // 2
+            g.add(sp)
+        return g
+    targets, shots = group(40, 40), group(300, 8)
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        pygame.sprite.groupcollide(targets, shots, False, False, pygame.sprite.collide_circle)
+    collide_ms = (time.perf_counter() - t0) * 1000.0 / frames
+
+    try:
+        tracker_probe = MediaPipeTracker(1)
+        infer_ms = benchmark_tracker(tracker_probe, frames=5)
+        tracker_probe.close()
+    except Exception:
+        infer_ms = float('inf')
+
+    frame_ms = render_ms + collide_ms
+    if frame_ms < 6.0 and infer_ms < 20.0:
+        name = 'high'
+    elif frame_ms < 15.0 and infer_ms < 45.0:
+        name = 'medium'
+    else:
+        name = 'low'
+    result = {'profile': name, 'render_ms': round(render_ms, 2), 'collide_ms': round(collide_ms, 2),
+              'infer_ms': round(infer_ms, 2) if infer_ms != float('inf') else None}
+    print(f"[profile] render {render_ms:.1f}ms  collide {collide_ms:.2f}ms  infer {infer_ms:.1f}ms -> {name}")
+    return result
+
+def choose_profile(requested=None, calibrate=False):
+    """Profil sesi live: --profile > settings.json > kalibrasi (pertama kali / --calibrate)."""
+    settings = load_settings()
+    if requested:
+        return requested, 'manual'
+    if not calibrate and settings.get('profile') in HARDWARE_PROFILES:
+        return settings['profile'], settings.get('profile_source', 'saved')
+    result = calibrate_hardware()
+    settings.update(profile=result['profile'], profile_source='auto', calibration=result)
+    try:
+        save_settings(settings)
+    except OSError:
+        pass
+    return result['profile'], 'auto'
+
+# --- Game Clock ---
+# Semua logika game membaca waktu dari sini. Jam di-latch sekali per frame
+# (mode normal) atau dimajukan 1000/FPS ms per tick (mode headless), jadi
+# timer senjata, gelombang, dsb tetap benar walau simulasi jalan lebih cepat
+# dari realtime.
+class GameClock:
+    def __init__(self):
+        self.ms = 0
+
+    def latch(self):
+        self.ms = pygame.time.get_ticks()
+
+    def advance(self, dt_ms):
+        self.ms += dt_ms
+
+game_clock = GameClock()
+
+def get_ticks():
+    return int(game_clock.ms)
+
+# --- Frame Profiler ---
+# Overlay debug (F3): grafik frame time + breakdown per fase. Saat mati,
+# begin/mark/end adalah no-op sehingga instrumentasi praktis gratis.
+PROFILE_PHASES = ('events', 'cv', 'input', 'update', 'wave', 'collide', 'world', 'hud', 'scale', 'flip')
+PROFILE_LABELS = {
+    'events': "Event pump", 'cv': "CV snapshot", 'input': "Input", 'update': "Entity update",
+    'wave': "Wave logic", 'collide': "Collisions", 'world': "World draw", 'hud': "HUD draw",
+    'scale': "Scaling", 'flip': "Flip",
+}
+PROFILE_COLORS = {
+    'events': (150, 150, 150), 'cv': (0, 200, 255), 'input': (0, 120, 255), 'update': (0, 255, 120),
+    'wave': (180, 255, 0), 'collide': (255, 220, 0), 'world': (255, 140, 0), 'hud': (255, 60, 60),
+    'scale': (255, 0, 200), 'flip': (160, 80, 255),
+}
+
+class FrameProfiler:
+    def __init__(self, history=120):
+        self.enabled = False
+        self.frame_ms = deque(maxlen=history)
+        self.phase_ms = dict.fromkeys(PROFILE_PHASES, 0.0) # EMA per fase
+        self.current = {}
+        self.phase = None
+        self.t_phase = 0.0
+        self.cv_rate = 0.0
+        self.cv_last_count = 0
+        self.cv_last_time = time.perf_counter()
+        self.begin = self.mark = self.end = self._noop
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        if self.enabled:
+            self.begin, self.mark, self.end = self._begin, self._mark, self._end
+        else:
+            self.begin = self.mark = self.end = self._noop
+            self.frame_ms.clear()
+
+    def _noop(self, *args):
+        pass
+
+    def _begin(self):
+        self.current = dict.fromkeys(PROFILE_PHASES, 0.0)
+        self.phase = None
+        self.t_phase = time.perf_counter()
+
+    def _mark(self, phase):
+        now = time.perf_counter()
+        if self.phase is not None:
+            self.current[self.phase] += (now - self.t_phase) * 1000.0
+        self.phase = phase
+        self.t_phase = now
+
+    def _end(self):
+        self._mark(None)
+        total = 0.0
+        for name, ms in self.current.items():
+            self.phase_ms[name] += (ms - self.phase_ms[name]) * 0.1
+            total += ms
+        self.frame_ms.append(total)
+
+        now = time.perf_counter()
+        if now - self.cv_last_time >= 1.0:
+            self.cv_rate = (capture_stats.processed - self.cv_last_count) / (now - self.cv_last_time)
+            self.cv_last_count = capture_stats.processed
+            self.cv_last_time = now
+
+profiler = FrameProfiler()
+
+# --- Telemetry ---
+# Counter, gauge dan event log ringan untuk keputusan runtime (CV adaptif,
+# dsb). Diekspor ke JSON saat keluar jika --telemetry FILE diberikan.
+class Telemetry:
+    def __init__(self, max_events=2000):
+        self.counters = {}
+        self.gauges = {}
+        self.events = deque(maxlen=max_events)
+        self.sections = {} # nama -> callable, dievaluasi saat snapshot/export
+        self.t0 = time.perf_counter()
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name, value):
+        self.gauges[name] = value
+
+    def event(self, kind, **fields):
+        fields['t'] = round(time.perf_counter() - self.t0, 3)
+        fields['kind'] = kind
+        self.events.append(fields)
+
+    def add_section(self, name, provider):
+        self.sections[name] = provider
+
+    def snapshot(self):
+        snap = {
+            'counters': dict(self.counters),
+            'gauges': dict(self.gauges),
+            'events': list(self.events),
+        }
+        for name, provider in self.sections.items():
+            snap[name] = provider()
+        return snap
+
+    def export(self, path):
+        import json
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+telemetry = Telemetry()
+
+# --- Latency Tracker ---
+# Motion-to-photon untuk kontrol tangan. Tiap snapshot CV membawa capture_ts
+# + durasi preprocess/inference + publish_ts; sisi game mencatat kapan seq
+# baru pertama kali dibaca, kapan dipakai untuk gerak/tembak, dan flip
+# pertama sesudahnya. Semua tahap diukur relatif ke capture (ms), kecuali
+# preprocess/infer yang berupa durasi.
+LATENCY_STAGES = ('preprocess', 'infer', 'publish', 'consume', 'move', 'shoot', 'photon')
+
+class LatencyTracker:
+    def __init__(self, history=300):
+        self.samples = {name: deque(maxlen=history) for name in LATENCY_STAGES}
+        self.reset()
+
+    def reset(self):
+        for d in self.samples.values():
+            d.clear()
+        self.seq = 0
+        self.pending = {} # tahap -> capture_ts, menunggu flip berikutnya
+        self.acted = {}   # aksi -> seq terakhir yang sudah dicatat
+
+    def consume(self, cv, now):
+        if not cv.capture_ts or cv.seq == self.seq:
+            return
+        self.seq = cv.seq
+        s = self.samples
+        s['preprocess'].append(cv.preprocess_ms)
+        s['infer'].append(cv.infer_ms)
+        s['publish'].append((cv.publish_ts - cv.capture_ts) * 1000.0)
+        s['consume'].append((now - cv.capture_ts) * 1000.0)
+        self.pending['photon'] = cv.capture_ts
+
+    def action(self, kind, cv):
+        # Satu sampel per snapshot: gestur yang sama dipakai beberapa frame
+        if not cv.capture_ts or self.acted.get(kind) == cv.seq:
+            return
+        self.acted[kind] = cv.seq
+        self.pending[kind] = cv.capture_ts
+
+    def flip(self, now):
+        if not self.pending:
+            return
+        for kind, capture_ts in self.pending.items():
+            self.samples[kind].append((now - capture_ts) * 1000.0)
+        self.pending.clear()
+
+    def percentiles(self):
+        out = {}
+        for name, d in self.samples.items():
+            vals = sorted(d)
+            out[name] = {'n': len(vals), 'p50': round(percentile(vals, 50), 2),
+                         'p95': round(percentile(vals, 95), 2), 'p99': round(percentile(vals, 99), 2)}
+        return out
+
+latency = LatencyTracker()
+telemetry.add_section('latency', latency.percentiles)
+
+# --- VFX Governor ---
+# Semua logika terikat ke frame rate, jadi frame yang lewat budget membuat
+# seluruh game melambat. Governor mengukur waktu kerja per frame (tanpa sleep
+# clock.tick) dan mematikan efek opsional satu per satu sesuai urutan
+# prioritas, lalu menyalakannya lagi (urutan terbalik) saat headroom kembali.
+VFX_TIERS = ('trail', 'hit_particles', 'floating_text', 'explosion_scale', 'shockwave', 'shake')
+VFX_GOVERNOR = {
+    'degrade_frac': 0.9,  # EMA waktu kerja > 90% budget -> matikan tier berikutnya
+    'restore_frac': 0.6,  # EMA < 60% budget -> nyalakan lagi tier terakhir
+    'spike_frac': 1.5,    # Satu frame > 150% budget langsung dihitung
+    'hold_frames': 30,    # Minimal frame antar perubahan (histeresis)
+}
+
+class VfxGovernor:
+    def __init__(self, config=VFX_GOVERNOR):
+        self.config = config
+        self.on = dict.fromkeys(VFX_TIERS, True)
+        self.reset()
+
+    def reset(self, enabled=True):
+        # Headless dimatikan: keputusan berbasis waktu nyata tidak deterministik
+        self.enabled = enabled
+        self.level = 0 # Jumlah tier yang sedang dimatikan
+        for name in VFX_TIERS:
+            self.on[name] = True
+        self.ema_ms = None
+        self.frames = 0
+        self.last_change = 0
+        self.t_start = None
+
+    def frame_start(self):
+        self.t_start = time.perf_counter()
+
+    def frame_end(self, fps):
+        if not self.enabled or self.t_start is None:
+            return
+        ms = (time.perf_counter() - self.t_start) * 1000.0
+        budget = 1000.0 / fps
+        cfg = self.config
+        self.frames += 1
+        if ms > budget * cfg['spike_frac']:
+            self.ema_ms = ms
+        else:
+            self.ema_ms = ms if self.ema_ms is None else self.ema_ms + (ms - self.ema_ms) * 0.1
+        if self.frames - self.last_change < cfg['hold_frames']:
+            return
+        if self.ema_ms > budget * cfg['degrade_frac'] and self.level < len(VFX_TIERS):
+            self._set(VFX_TIERS[self.level], False, budget)
+            self.level += 1
+        elif self.ema_ms < budget * cfg['restore_frac'] and self.level > 0:
+            self.level -= 1
+            self._set(VFX_TIERS[self.level], True, budget)
+
+    def _set(self, tier, value, budget):
+        self.on[tier] = value
+        self.last_change = self.frames
+        kind = 'vfx_restore' if value else 'vfx_degrade'
+        telemetry.count(kind)
+        telemetry.event(kind, tier=tier, frame_ms=round(self.ema_ms, 2), budget_ms=round(budget, 2))
+
+    def state(self):
+        return {'level': self.level, 'shed': [t for t in VFX_TIERS if not self.on[t]],
+                'ema_ms': round(self.ema_ms, 2) if self.ema_ms is not None else None}
+
+vfx_governor = VfxGovernor()
+telemetry.add_section('vfx', vfx_governor.state)
+
+# --- Sound Manager ---
+# Semua efek suara lewat pool channel dengan budget tetap. play() hanya
+# mencatat permintaan; flush() sekali per tick memutar paling banyak satu
+# voice per suara (permintaan identik dalam tick yang sama digabung dengan
+# volume lebih besar), menghormati batas instance & cooldown per suara, dan
+# mencuri channel dari suara berprioritas lebih rendah bila pool penuh.
+SOUND_CONFIG = {
+    'channels': 8,
+    'batch_gain': 0.15, # Tambahan volume per permintaan identik yang digabung
+    'max_gain': 1.8,    # Batas penggandaan volume hasil batching
+}
+
+class PooledSound:
+    def __init__(self, manager, name, sound, volume, priority, max_instances, cooldown_ms):
+        self.manager = manager
+        self.name = name
+        self.sound = sound
+        self.volume = volume
+        self.priority = priority
+        self.max_instances = max_instances
+        self.cooldown_ms = cooldown_ms
+        self.last_start = None
+        sound.set_volume(1.0) # Volume diatur per channel saat diputar
+
+    def play(self):
+        self.manager.request(self)
+
+class SoundManager:
+    def __init__(self, config=SOUND_CONFIG):
+        self.config = config
+        self.sounds = {}
+        self.pending = {}
+        self.channels = []
+        self.owners = []
+        self.stats = dict.fromkeys(('requested', 'played', 'batched', 'capped', 'cooldown', 'stolen', 'dropped'), 0)
+
+    def reset(self):
+        # Dipanggil setelah pygame.mixer.init(): channel lama tidak valid lagi
+        n = self.config['channels']
+        pygame.mixer.stop()
+        pygame.mixer.set_num_channels(n)
+        self.channels = [pygame.mixer.Channel(i) for i in range(n)]
+        self.owners = [None] * n # (PooledSound, start_ms) per channel
+        self.sounds.clear()
+        self.pending.clear()
+        for k in self.stats:
+            self.stats[k] = 0
+
+    def register(self, name, sound, volume=1.0, priority=0, max_instances=2, cooldown_ms=0):
+        snd = PooledSound(self, name, sound, volume, priority, max_instances, cooldown_ms)
+        self.sounds[name] = snd
+        return snd
+
+    def request(self, snd):
+        self.pending[snd] = self.pending.get(snd, 0) + 1
+        self.stats['requested'] += 1
+
+    def active_voices(self):
+        return sum(1 for ch in self.channels if ch.get_busy())
+
+    def flush(self, now_ms):
+        if not self.pending:
+            return
+        stats = self.stats
+        for snd, n in sorted(self.pending.items(), key=lambda item: -item[0].priority):
+            stats['batched'] += n - 1
+            if snd.last_start is not None and now_ms - snd.last_start < snd.cooldown_ms:
+                stats['cooldown'] += 1
+                continue
+            busy = [i for i, ch in enumerate(self.channels) if ch.get_busy()]
+            if sum(1 for i in busy if self.owners[i] and self.owners[i][0] is snd) >= snd.max_instances:
+                stats['capped'] += 1
+                continue
+            idx = self._free_channel(busy, snd)
+            if idx is None:
+                stats['dropped'] += 1
+                continue
+            gain = min(self.config['max_gain'], 1.0 + self.config['batch_gain'] * (n - 1))
+            ch = self.channels[idx]
+            ch.play(snd.sound)
+            ch.set_volume(min(1.0, snd.volume * gain))
+            self.owners[idx] = (snd, now_ms)
+            snd.last_start = now_ms
+            stats['played'] += 1
+        self.pending.clear()
+
+    def _free_channel(self, busy, snd):
+        busy_set = set(busy)
+        for i in range(len(self.channels)):
+            if i not in busy_set:
+                return i
+        # Pool penuh: curi voice tertua dari prioritas terendah (<= prioritas ini)
+        victims = [i for i in busy if self.owners[i] is None or self.owners[i][0].priority <= snd.priority]
+        if not victims:
+            return None
+        idx = min(victims, key=lambda i: (self.owners[i][0].priority, self.owners[i][1]) if self.owners[i] else (-1, 0))
+        self.channels[idx].stop()
+        self.stats['stolen'] += 1
+        return idx
+
+    def snapshot(self):
+        return dict(self.stats, active=self.active_voices(), channels=len(self.channels))
+
+sound_manager = SoundManager()
+telemetry.add_section('audio', sound_manager.snapshot)
+
+# --- Music Manager ---
+# Track musik didekode sekali ke memori (Sound) dan diputar di dua channel
+# khusus sesudah pool SFX, jadi pindah track = cross-fade antar channel tanpa
+# I/O atau setup decoder di tengah frame. Track awal didekode saat startup,
+# sisanya di thread background; play() untuk track yang belum siap dicatat
+# dan dimulai oleh update() begitu selesai dimuat.
+MUSIC_CONFIG = {
+    'volume': 0.4,
+    'fade_ms': 800,
+}
+
+class MusicManager:
+    def __init__(self, config=MUSIC_CONFIG):
+        self.config = config
+        self.paths = {}
+        self.tracks = {} # nama -> Sound, atau False jika gagal didekode (fallback stream)
+        self.lock = threading.Lock()
+        self.channels = []
+        self.active = 0
+        self.current = None
+        self.wanted = None
+        self.streaming = False
+        self.generation = 0 # Loader dari sesi mixer sebelumnya tidak boleh menulis hasilnya
+        self.stats = {'loaded': 0, 'load_ms': 0.0, 'switches': 0, 'streamed': 0}
+
+    def reset(self, first_channel):
+        # Dipanggil sesudah sound_manager.reset(): channel musik di atas pool SFX
+        pygame.mixer.set_num_channels(first_channel + 2)
+        self.channels = [pygame.mixer.Channel(first_channel + i) for i in range(2)]
+        self.active = 0
+        self.current = self.wanted = None
+        self.streaming = False
+        with self.lock:
+            self.generation += 1
+            self.tracks.clear()
+        self.paths.clear()
+
+    def preload(self, tracks, first=None):
+        self.paths.update(tracks)
+        gen = self.generation
+        if first is not None:
+            self._load(first, gen)
+        rest = [name for name in tracks if name != first]
+        if rest:
+            threading.Thread(target=lambda: [self._load(name, gen) for name in rest], daemon=True).start()
+
+    def _load(self, name, gen):
+        t0 = time.perf_counter()
+        try:
+            snd = pygame.mixer.Sound(self.paths[name])
+            snd.set_volume(self.config['volume'])
+        except (pygame.error, FileNotFoundError):
+            snd = False
+        with self.lock:
+            if gen != self.generation:
+                return
+            self.tracks[name] = snd
+        self.stats['loaded'] += 1
+        self.stats['load_ms'] += (time.perf_counter() - t0) * 1000.0
+
+    def play(self, name):
+        self.wanted = name
+        self.update()
+
+    def update(self):
+        name = self.wanted
+        if name is None or name == self.current:
+            return
+        with self.lock:
+            snd = self.tracks.get(name)
+        if snd is None:
+            return # Masih dimuat di background
+        fade = self.config['fade_ms'] if self.current is not None else 0
+        if self.current is not None:
+            self.channels[self.active].fadeout(self.config['fade_ms'])
+        if self.streaming:
+            pygame.mixer.music.stop()
+            self.streaming = False
+        if snd is False:
+            # Format tidak bisa didekode ke Sound: stream dari disk seperti dulu
+            try:
+                pygame.mixer.music.load(self.paths[name])
+                pygame.mixer.music.set_volume(self.config['volume'])
+                pygame.mixer.music.play(-1)
+                self.streaming = True
+                self.stats['streamed'] += 1
+            except pygame.error:
+                pass
+        else:
+            self.active ^= 1
+            self.channels[self.active].play(snd, loops=-1, fade_ms=fade)
+        self.current = name
+        self.stats['switches'] += 1
+
+    def pause(self):
+        for ch in self.channels:
+            ch.pause()
+        pygame.mixer.music.pause()
+
+    def unpause(self):
+        for ch in self.channels:
+            ch.unpause()
+        pygame.mixer.music.unpause()
+
+    def stop(self):
+        for ch in self.channels:
+            ch.stop()
+        pygame.mixer.music.stop()
+        self.streaming = False
+        self.current = self.wanted = None
+
+music_manager = MusicManager()
+telemetry.add_section('music', lambda: dict(music_manager.stats, current=music_manager.current))
+
+# --- High Score Persistence ---
+# Game loop hanya mengubah nilai di memori. Thread background menulis file
+# paling sering tiap flush_interval detik, atau segera saat diminta (game
+# over, kembali ke menu), lewat file sementara + os.replace supaya crash di
+# tengah penulisan tidak pernah meninggalkan file terpotong.
+HIGHSCORE_FLUSH_S = 5.0
+
+class HighScoreStore:
+    def __init__(self, path, flush_interval=HIGHSCORE_FLUSH_S):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.value = 0
+        self.saved = 0
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.write_ms = deque(maxlen=200)
+        self.stats = {'updates': 0, 'writes': 0, 'failures': 0}
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                self.value = int(f.read().strip())
+        except (OSError, ValueError):
+            self.value = 0
+        self.saved = self.value
+        return self.value
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def update(self, value):
+        with self.lock:
+            if value > self.value:
+                self.value = value
+                self.stats['updates'] += 1
+
+    def request_flush(self):
+        self.wake.set()
+
+    def close(self):
+        if self.thread is not None:
+            self.stop_event.set()
+            self.wake.set()
+            self.thread.join(timeout=2.0)
+            self.thread = None
+        self._flush() # Penulisan terakhir (sinkron) saat keluar
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            self._flush()
+
+    def _flush(self):
+        with self.lock:
+            value = self.value
+        if value == self.saved:
+            return
+        t0 = time.perf_counter()
+        tmp = self.path + '.tmp'
+        try:
+            with open(tmp, 'w') as f:
+                f.write(str(value))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except OSError:
+            self.stats['failures'] += 1
+            return
+        self.saved = value
+        self.stats['writes'] += 1
+        self.write_ms.append((time.perf_counter() - t0) * 1000.0)
+
+    def snapshot(self):
+        vals = sorted(self.write_ms)
+        return dict(self.stats, value=self.value, saved=self.saved,
+                    write_p50_ms=round(percentile(vals, 50), 3), write_max_ms=round(vals[-1], 3) if vals else 0.0)
+
+highscore_store = HighScoreStore(HIGH_SCORE_FILE)
+telemetry.add_section('highscore', highscore_store.snapshot)
+
+# --- Session History ---
+# Setiap sesi live yang selesai (game over) dicatat ke SQLite (WAL). Koneksi
+# baru dibuka saat pertama dibutuhkan, di thread worker sendiri: game loop
+# hanya menaruh baris ke antrean dan membaca hasil query yang sudah di-cache
+# (top-N + personal best per mode), jadi startup dan frame tidak menunggu disk.
+SESSION_DB_FILE = os.path.join(game_folder, "sessions.db")
+SESSION_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS sessions (
+        id INTEGER PRIMARY KEY,
+        played_at REAL NOT NULL,
+        score INTEGER NOT NULL,
+        wave INTEGER NOT NULL,
+        kills INTEGER NOT NULL,
+        max_combo INTEGER NOT NULL,
+        duration_s INTEGER NOT NULL,
+        rank TEXT NOT NULL,
+        mode TEXT NOT NULL,
+        profile TEXT NOT NULL,
+        outcome TEXT NOT NULL DEFAULT 'gameover'
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_sessions_score ON sessions (score DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_sessions_mode_score ON sessions (mode, score DESC)", # Personal best per mode
+    "CREATE INDEX IF NOT EXISTS idx_sessions_played_at ON sessions (played_at)",
+)
+# outcome: 'gameover', atau 'abandoned' (keluar ke menu / tutup window di tengah run)
+SESSION_COLUMNS = ('played_at', 'score', 'wave', 'kills', 'max_combo', 'duration_s', 'rank', 'mode', 'profile',
+                   'outcome')
+LeaderboardEntry = namedtuple('LeaderboardEntry', 'score wave kills rank mode played_at')
+
+class SessionStore:
+    def __init__(self, path, top_n=5):
+        self.path = path
+        self.top_n = top_n
+        self.conn = None
+        self.jobs = queue.Queue()
+        self.thread = None
+        self.pending = []
+        self.lock = threading.Lock()
+        # Cache hasil query: diganti utuh oleh worker (pembaca tidak perlu lock)
+        self.top = ()
+        self.bests = {}
+        self.stats = {'inserted': 0, 'batches': 0, 'open_ms': None, 'query_ms': 0.0, 'failures': 0}
+
+    def refresh(self):
+        self._submit('refresh')
+
+    def record(self, **row):
+        with self.lock:
+            self.pending.append(tuple(row[c] for c in SESSION_COLUMNS))
+        self._submit('flush')
+
+    def best_for(self, mode):
+        return self.bests.get(mode, 0)
+
+    def close(self):
+        if self.thread is not None:
+            self.jobs.put(None)
+            self.thread.join(timeout=3.0)
+            self.thread = None
+
+    def _submit(self, job):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        self.jobs.put(job)
+
+    def _run(self):
+        import sqlite3
+        try:
+            self._open()
+        except sqlite3.Error:
+            self.stats['failures'] += 1
+            return
+        while True:
+            job = self.jobs.get()
+            # Gabungkan job yang menumpuk jadi satu batch insert + satu refresh
+            jobs = [job]
+            while not self.jobs.empty():
+                jobs.append(self.jobs.get())
+            try:
+                self._flush()
+                self._refresh()
+            except sqlite3.Error:
+                self.stats['failures'] += 1
+            if None in jobs:
+                break
+        self.conn.close()
+        self.conn = None
+
+    def _open(self):
+        import sqlite3
+        t0 = time.perf_counter()
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            for stmt in SESSION_SCHEMA:
+                self.conn.execute(stmt)
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(sessions)")}
+            if 'outcome' not in columns: # DB dari versi sebelum kolom outcome
+                self.conn.execute("ALTER TABLE sessions ADD COLUMN outcome TEXT NOT NULL DEFAULT 'gameover'")
+        self.stats['open_ms'] = round((time.perf_counter() - t0) * 1000.0, 2)
+
+    def _flush(self):
+        with self.lock:
+            rows, self.pending = self.pending, []
+        if not rows:
+            return
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO sessions ({', '.join(SESSION_COLUMNS)}) VALUES ({', '.join('?' * len(SESSION_COLUMNS))})",
+                rows)
+        self.stats['inserted'] += len(rows)
+        self.stats['batches'] += 1
+
+    def _refresh(self):
+        t0 = time.perf_counter()
+        top = self.conn.execute(
+            "SELECT score, wave, kills, rank, mode, played_at FROM sessions ORDER BY score DESC LIMIT ?",
+            (self.top_n,)).fetchall()
+        # Satu lookup indeks (mode, score DESC) per mode
+        bests = self.conn.execute("SELECT mode, MAX(score) FROM sessions GROUP BY mode").fetchall()
+        self.top = tuple(LeaderboardEntry(*row) for row in top)
+        self.bests = dict(bests)
+        self.stats['query_ms'] = round((time.perf_counter() - t0) * 1000.0, 3)
+
+    def snapshot(self):
+        return dict(self.stats, top=[e.score for e in self.top], bests=dict(self.bests))
+
+session_store = SessionStore(SESSION_DB_FILE)
+telemetry.add_section('sessions', session_store.snapshot)
+
+# --- RNG Streams ---
+# Satu seed -> beberapa stream terpisah. Gameplay (spawn, AI, loot) tidak
+# pernah berbagi stream dengan VFX, jadi partikel/shake tidak bisa mengubah
+# jalannya simulasi dan seed yang sama selalu menghasilkan game yang sama.
+class RngStreams:
+    STREAMS = ('spawn', 'ai', 'loot', 'vfx')
+
+    def __init__(self, seed=None):
+        self.reseed(seed)
+
+    def reseed(self, seed=None):
+        if seed is None:
+            seed = random.SystemRandom().randrange(2**32)
+        self.seed = seed
+        for name in self.STREAMS:
+            setattr(self, name, random.Random(f"{seed}:{name}"))
+
+rng = RngStreams()
+
+# --- Cursor Filter ---
+# Landmark datang ~20 Hz, game render 45 FPS. Posisi telunjuk dihaluskan
+# dengan One Euro filter (cutoff naik saat tangan bergerak cepat -> sedikit
+# lag saat cepat, sedikit jitter saat diam) lalu diprediksi dengan kecepatan
+# hasil filter ke waktu frame ditampilkan. Akurasi prediksi diukur setiap
+# sampel baru: error prediksi vs error kalau posisi lama sekadar ditahan.
+CURSOR_FILTER = {
+    'enabled': True,
+    'min_cutoff': 1.5,      # Hz, smoothing saat tangan diam
+    'beta': 10.0,           # Kenaikan cutoff per (fraksi layar / detik)
+    'd_cutoff': 1.0,        # Hz, smoothing estimasi kecepatan
+    'predict': True,
+    'lead_ms': None,        # Jarak poll -> flip; None = 1 frame (1000 / FPS)
+    'max_predict_ms': 100.0,
+}
+
+def smoothing_alpha(cutoff, dt):
+    tau = 1.0 / (2.0 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+class OneEuroFilter:
+    def __init__(self, min_cutoff, beta, d_cutoff):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.dx = 0.0
+        self.t = None
+
+    def __call__(self, x, t):
+        if self.x is None:
+            self.x, self.t = x, t
+            return x
+        dt = t - self.t
+        if dt <= 0:
+            return self.x
+        a_d = smoothing_alpha(self.d_cutoff, dt)
+        self.dx += a_d * ((x - self.x) / dt - self.dx)
+        a = smoothing_alpha(self.min_cutoff + self.beta * abs(self.dx), dt)
+        self.x += a * (x - self.x)
+        self.t = t
+        return self.x
+
+class CursorFilter:
+    def __init__(self, config=CURSOR_FILTER, name='cursor'):
+        self.config = config
+        self.name = name
+        self.fx = OneEuroFilter(config['min_cutoff'], config['beta'], config['d_cutoff'])
+        self.fy = OneEuroFilter(config['min_cutoff'], config['beta'], config['d_cutoff'])
+        self.seq = None
+        self.pred = None # Prediksi terakhir (t, x, y) untuk mengukur error
+        self.err_pred = 0.0
+        self.err_hold = 0.0
+        self.horizon_ms = 0.0
+
+    def reset(self):
+        self.fx.reset()
+        self.fy.reset()
+        self.pred = None
+
+    def apply(self, cv, now):
+        cfg = self.config
+        if not cfg['enabled']:
+            return cv
+        if not cv.hand_present:
+            self.reset()
+            return cv
+
+        if cv.seq != self.seq:
+            self.seq = cv.seq
+            t = cv.capture_ts
+            if self.pred is not None:
+                # Seberapa dekat prediksi sebelumnya ke sampel baru (vs sekadar menahan posisi)
+                pt, px, py, hx, hy = self.pred
+                err_p = math.hypot(px + (t - pt) * self.fx.dx - cv.index_x_frac, py + (t - pt) * self.fy.dx - cv.index_y_frac)
+                err_h = math.hypot(hx - cv.index_x_frac, hy - cv.index_y_frac)
+                self.err_pred += (err_p - self.err_pred) * 0.05
+                self.err_hold += (err_h - self.err_hold) * 0.05
+            self.fx(cv.index_x_frac, t)
+            self.fy(cv.index_y_frac, t)
+            self.pred = (t, self.fx.x, self.fy.x, cv.index_x_frac, cv.index_y_frac)
+            self.publish()
+
+        x, y = self.fx.x, self.fy.x
+        if cfg['predict']:
+            lead = cfg['lead_ms'] if cfg['lead_ms'] is not None else 1000.0 / FPS
+            horizon = min((now - self.fx.t) * 1000.0 + lead, cfg['max_predict_ms'])
+            self.horizon_ms += (horizon - self.horizon_ms) * 0.05
+            x += self.fx.dx * horizon / 1000.0
+            y += self.fy.dx * horizon / 1000.0
+        return cv._replace(index_x_frac=max(0.0, min(1.0, x)), index_y_frac=max(0.0, min(1.0, y)))
+
+    def publish(self):
+        telemetry.gauge(self.name + '_predict_ms', round(self.horizon_ms, 1))
+        telemetry.gauge(self.name + '_err_pred', round(self.err_pred, 4))
+        telemetry.gauge(self.name + '_err_hold', round(self.err_hold, 4))
+
+cursor_filter = CursorFilter()
+
+# --- Input Sources ---
+# Loop utama membaca input lewat poll() -> (events, keys, cv). LiveInput
+# memakai pygame + kamera; ScriptedInput menghasilkan input dari seed untuk
+# soak test / balancing tanpa keyboard & kamera (autoplay: langsung main,
+# restart otomatis saat game over).
+class KeyState(dict):
+    """Pengganti pygame.key.get_pressed(): tombol yang tidak ada = False."""
+    def __missing__(self, key):
+        return False
+
+class LiveInput:
+    live = True
+    autoplay = False
+    uses_cv = False
+
+    def __init__(self):
+        self.cursor = cursor_filter
+        self.cursor.reset()
+        self.slot_cursors = {}
+        self.players = (EMPTY_CV,)
+
+    @staticmethod
+    def _fresh(cv):
+        if cv.hand_present and cv_is_stale(cv):
+            # Kamera macet/terlambat: jangan biarkan gestur lama terus aktif
+            cv = cv._replace(hand_present=False, pinch_distance=None, index_folded=False, middle_folded=False)
+        return cv
+
+    def player_snapshot(self, slot):
+        """Snapshot CV pemain lain (co-op) dari tuple yang sama dengan poll() tick ini."""
+        if slot not in self.slot_cursors:
+            self.slot_cursors[slot] = CursorFilter(name=f"cursor_p{slot + 1}")
+        cv = self.players[slot] if slot < len(self.players) else EMPTY_CV
+        return self.slot_cursors[slot].apply(self._fresh(cv), time.perf_counter())
+
+    def poll(self, tick):
+        events = pygame.event.get()
+        profiler.mark('cv')
+        # Satu pembacaan per tick: semua pemain berasal dari publish yang sama
+        self.players = (cv_worker.snapshot(),) if cv_worker is not None else latest_players
+        cv = self._fresh(self.players[0])
+        now = time.perf_counter()
+        latency.consume(cv, now)
+        cv = self.cursor.apply(cv, now)
+        profiler.mark('input')
+        keys = pygame.key.get_pressed()
+        return events, keys, cv
+
+class ScriptedInput:
+    live = False
+    autoplay = True
+    uses_cv = True
+
+    def __init__(self, seed=0, use_cv=True):
+        self.rand = random.Random(seed)
+        self.uses_cv = use_cv
+        self.x = 0.5
+        self.vx = 0.0
+        self.fire_ticks = 0
+        self.left = False
+        self.right = False
+
+    def poll(self, tick):
+        r = self.rand
+        # Random walk halus untuk posisi tangan / arah keyboard
+        if tick % 15 == 0:
+            self.vx = r.uniform(-0.03, 0.03)
+            self.left = r.random() < 0.3
+            self.right = not self.left and r.random() < 0.4
+        self.x = max(0.0, min(1.0, self.x + self.vx))
+        if self.x in (0.0, 1.0):
+            self.vx = -self.vx
+
+        if self.fire_ticks > 0:
+            self.fire_ticks -= 1
+        elif r.random() < 0.1:
+            self.fire_ticks = r.randint(10, 40)
+        firing = self.fire_ticks > 0
+        ulti = r.random() < 0.002
+
+        events = []
+        if ulti and not self.uses_cv:
+            events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_b))
+
+        keys = KeyState()
+        if not self.uses_cv:
+            keys[pygame.K_LEFT] = self.left
+            keys[pygame.K_RIGHT] = self.right
+            keys[pygame.K_SPACE] = firing
+
+        cv = EMPTY_CV._replace(
+            seq=tick + 1,
+            index_x_frac=self.x,
+            pinch_distance=0.02 if firing else 0.2,
+            index_folded=ulti,
+            middle_folded=ulti,
+            hand_present=self.uses_cv,
+        )
+        return events, keys, cv
+
+# --- Input Replay ---
+# Format biner .hbr: header lalu satu record 15 byte per tick
+#   header: magic, versi, flags (kamera/autoplay/cv), seed RNG, FPS, profil
+#           (versi 1 tanpa byte profil = medium)
+#   tick  : jam game (ms), bit tombol ditahan, bit KEYDOWN, x/y tangan
+#           (uint16 0..65535), jarak pinch (x10000, 0xFFFF = None), flags
+# Nilai CV yang dipakai game saat merekam sudah dikuantisasi sama persis
+# dengan yang dibaca saat replay, jadi replay identik tick per tick.
+REPLAY_MAGIC = b'HBRP'
+REPLAY_VERSION = 2
+REPLAY_HEADER = struct.Struct('<4sBBQHB')
+REPLAY_HEADER_V1 = struct.Struct('<4sBBQH')
+REPLAY_TICK = struct.Struct('<IHHHHHB')
+REPLAY_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE, pygame.K_b, pygame.K_p,
+               pygame.K_ESCAPE, pygame.K_RETURN, pygame.K_q, pygame.K_k)
+REPLAY_FLUSH_TICKS = 64
+replay_folder = os.path.join(game_folder, "replays")
+# Retensi rekaman otomatis (session-*.hbr): simpan N terbaru dan total ukuran maksimal
+REPLAY_KEEP = 50
+REPLAY_MAX_BYTES = 64 * 1024 * 1024
+
+HDR_CAMERA, HDR_AUTOPLAY, HDR_CV = 1, 2, 4
+TICK_HAND, TICK_INDEX_FOLDED, TICK_MIDDLE_FOLDED, TICK_QUIT = 1, 2, 4, 8
+PINCH_NONE = 0xFFFF
+
+def encode_cv(cv):
+    x = int(max(0.0, min(1.0, cv.index_x_frac)) * 65535)
+    y = int(max(0.0, min(1.0, cv.index_y_frac)) * 65535)
+    pinch = cv.pinch_distance
+    pinch = PINCH_NONE if pinch is None else min(PINCH_NONE - 1, int(pinch * 10000))
+    flags = 0
+    if cv.hand_present: flags |= TICK_HAND
+    if cv.index_folded: flags |= TICK_INDEX_FOLDED
+    if cv.middle_folded: flags |= TICK_MIDDLE_FOLDED
+    return x, y, pinch, flags
+
+def decode_cv(x, y, pinch, flags, base=EMPTY_CV):
+    return base._replace(
+        index_x_frac=x / 65535,
+        index_y_frac=y / 65535,
+        pinch_distance=None if pinch == PINCH_NONE else pinch / 10000,
+        index_folded=bool(flags & TICK_INDEX_FOLDED),
+        middle_folded=bool(flags & TICK_MIDDLE_FOLDED),
+        hand_present=bool(flags & TICK_HAND),
+    )
+
+class ReplayWriter(threading.Thread):
+    """Menulis chunk replay ke disk di background supaya loop game tidak kena I/O."""
+    def __init__(self, path, header):
+        super().__init__(daemon=True)
+        self.path = path
+        self.chunks = queue.Queue()
+        self.chunks.put(header)
+        self.start()
+
+    def run(self):
+        with open(self.path, 'wb') as f:
+            while True:
+                chunk = self.chunks.get()
+                if chunk is None:
+                    break
+                f.write(chunk)
+
+    def write(self, chunk):
+        self.chunks.put(chunk)
+
+    def close(self):
+        self.chunks.put(None)
+        self.join(timeout=2.0)
+
+def prune_replays(folder=None, keep=REPLAY_KEEP, max_bytes=REPLAY_MAX_BYTES):
+    """Hapus rekaman sesi otomatis terlama sampai tersisa `keep` file dan total <= `max_bytes`.
+
+    Nama file memuat timestamp, jadi urutan nama = urutan waktu. Rekaman dengan path
+    eksplisit (--record FILE) tidak disentuh. Mengembalikan jumlah file yang dihapus.
+    """
+    import glob
+    folder = folder or replay_folder
+    paths = sorted(glob.glob(os.path.join(glob.escape(folder), 'session-*.hbr')), reverse=True)
+    removed = 0
+    total = 0
+    for i, path in enumerate(paths):
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            continue
+        total += size
+        if i < keep and total <= max_bytes:
+            continue
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+class RecordingInput:
+    """Membungkus sumber input lain dan merekam setiap tick ke file .hbr."""
+    def __init__(self, inner, path, seed, camera_available):
+        self.inner = inner
+        self.live = inner.live
+        self.autoplay = inner.autoplay
+        self.uses_cv = inner.uses_cv
+        self.path = path
+        flags = 0
+        if camera_available: flags |= HDR_CAMERA
+        if inner.autoplay: flags |= HDR_AUTOPLAY
+        if inner.uses_cv: flags |= HDR_CV
+        header = REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, flags, seed, FPS,
+                                    PROFILE_NAMES.index(active_profile['name']))
+        self.writer = ReplayWriter(path, header)
+        self.buf = bytearray(REPLAY_TICK.size * REPLAY_FLUSH_TICKS)
+        self.count = 0
+        self.ticks = 0
+        self.overhead_s = 0.0
+
+    def poll(self, tick):
+        events, keys, cv = self.inner.poll(tick)
+        t0 = time.perf_counter()
+        held = 0
+        pressed = 0
+        quit_flag = 0
+        for bit, key in enumerate(REPLAY_KEYS):
+            if keys[key]:
+                held |= 1 << bit
+        for event in events:
+            if event.type == pygame.QUIT:
+                quit_flag = TICK_QUIT
+            elif event.type == pygame.KEYDOWN and event.key in REPLAY_KEYS:
+                pressed |= 1 << REPLAY_KEYS.index(event.key)
+        x, y, pinch, flags = encode_cv(cv)
+        REPLAY_TICK.pack_into(self.buf, self.count * REPLAY_TICK.size,
+                              get_ticks(), held, pressed, x, y, pinch, flags | quit_flag)
+        self.count += 1
+        self.ticks += 1
+        if self.count == REPLAY_FLUSH_TICKS:
+            self.writer.write(bytes(self.buf))
+            self.count = 0
+        cv = decode_cv(x, y, pinch, flags, cv)
+        self.overhead_s += time.perf_counter() - t0
+        return events, keys, cv
+
+    def close(self):
+        if self.count:
+            self.writer.write(bytes(self.buf[:self.count * REPLAY_TICK.size]))
+            self.count = 0
+        self.writer.close()
+        close = getattr(self.inner, 'close', None)
+        if close: close()
+
+class ReplayInput:
+    """Memutar ulang file .hbr: jam game, tombol, event, dan CV per tick."""
+    live = False
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version = data[:4], data[4] if len(data) > 4 else None
+        if magic != REPLAY_MAGIC or version not in (1, REPLAY_VERSION):
+            raise ValueError(f"Bukan file replay yang valid: {path}")
+        if version == 1:
+            header = REPLAY_HEADER_V1
+            magic, version, flags, seed, fps = header.unpack_from(data, 0)
+            profile = PROFILE_NAMES.index('medium')
+        else:
+            header = REPLAY_HEADER
+            magic, version, flags, seed, fps, profile = header.unpack_from(data, 0)
+        self.profile = PROFILE_NAMES[profile]
+        self.seed = seed
+        self.fps = fps
+        self.camera_available = bool(flags & HDR_CAMERA)
+        self.autoplay = bool(flags & HDR_AUTOPLAY)
+        self.uses_cv = bool(flags & HDR_CV)
+        body = memoryview(data)[header.size:]
+        usable = len(body) - len(body) % REPLAY_TICK.size
+        self.records = REPLAY_TICK.iter_unpack(body[:usable])
+        self.ticks = usable // REPLAY_TICK.size
+
+    def poll(self, tick):
+        # Window tetap responsif saat replay ditonton
+        events = [e for e in pygame.event.get() if e.type == pygame.QUIT]
+        rec = next(self.records, None)
+        if rec is None:
+            return [pygame.event.Event(pygame.QUIT)], KeyState(), decode_cv(32767, 32767, PINCH_NONE, 0)
+        clock_ms, held, pressed, x, y, pinch, flags = rec
+        game_clock.ms = clock_ms
+        keys = KeyState()
+        for bit, key in enumerate(REPLAY_KEYS):
+            if held & (1 << bit):
+                keys[key] = True
+            if pressed & (1 << bit):
+                events.append(pygame.event.Event(pygame.KEYDOWN, key=key))
+        if flags & TICK_QUIT:
+            events.append(pygame.event.Event(pygame.QUIT))
+        return events, keys, decode_cv(x, y, pinch, flags & ~TICK_QUIT)
+
 # --- CLASSES ---
 
 class MenuButton:
@@ -261,7 +2603,7 @@ class Explosion(pygame.sprite.Sprite):
     def __init__(self, center, scale=1.0):
         super().__init__()
         self.raw_image = explosion_sheet.copy()
-        if scale != 1.0:
+        if scale != 1.0 and vfx_governor.on['explosion_scale']:
             w = int(self.raw_image.get_width() * scale)
             h = int(self.raw_image.get_height() * scale)
             self.raw_image = pygame.transform.scale(self.raw_image, (w, h))
@@ -276,11 +2618,11 @@ class Explosion(pygame.sprite.Sprite):
         self.rect = self.image.get_rect()
         self.rect.center = center
         self.frame = 0
-        self.last_update = pygame.time.get_ticks()
+        self.last_update = get_ticks()
         self.frame_rate = 50
 
     def update(self, *args):
-        now = pygame.time.get_ticks()
+        now = get_ticks()
         if now - self.last_update > self.frame_rate:
             self.last_update = now
             self.frame += 1
@@ -335,25 +2677,28 @@ class PowerUp(pygame.sprite.Sprite):
             self.kill()
 
 class Player(pygame.sprite.Sprite):
-    def __init__(self):
+    def __init__(self, home_x=None, tint=None):
         super().__init__()
         self.image_original = player_img.copy() 
+        if tint:
+            self.image_original.fill(tint, special_flags=pygame.BLEND_RGB_MULT)
         self.image = self.image_original
         self.image.set_colorkey(BLACK)
         self.rect = self.image.get_rect()
         self.radius = int(self.rect.width * .85 / 2)
-        self.rect.centerx = WIDTH // 2
+        self.home_x = WIDTH // 2 if home_x is None else home_x # Posisi spawn/respawn
+        self.rect.centerx = self.home_x
         self.rect.bottom = HEIGHT - 10
         
         self.default_delay = 250
-        self.last_shot = pygame.time.get_ticks()
+        self.last_shot = get_ticks()
         self.lives = 3
         self.hidden = False
-        self.hide_timer = pygame.time.get_ticks()
+        self.hide_timer = get_ticks()
         
         self.powerup_type = 'normal' 
         self.invincible = False
-        self.invincible_timer = pygame.time.get_ticks()
+        self.invincible_timer = get_ticks()
         self.invincible_duration = 3000 
         self.shield_active = False
 
@@ -361,19 +2706,20 @@ class Player(pygame.sprite.Sprite):
         if p_type == 'shield':
             self.shield_active = True
             self.invincible = True
-            self.invincible_timer = pygame.time.get_ticks()
+            self.invincible_timer = get_ticks()
             self.invincible_duration = 5000 
         else:
             self.powerup_type = p_type
 
-    def update(self, target_x=None, all_sprites=None, *args):
+    def update(self, target_x=None, all_sprites=None, snap=False, *args):
+        # snap=True: target sudah dihaluskan + diprediksi (CursorFilter), jangan di-lerp lagi
         if target_x is None: return 
 
-        now = pygame.time.get_ticks()
+        now = get_ticks()
         
         # Engine Trail Particles
-        if not self.hidden and random.random() < 0.3 and all_sprites:
-            p = Particle(self.rect.centerx, self.rect.bottom, (100, 200, 255), random.randint(2,5), (random.uniform(-1,1), random.uniform(1,3)), 20)
+        if not self.hidden and vfx_governor.on['trail'] and rng.vfx.random() < 0.3 * PARTICLE_RATE and all_sprites:
+            p = Particle(self.rect.centerx, self.rect.bottom, (100, 200, 255), rng.vfx.randint(2,5), (rng.vfx.uniform(-1,1), rng.vfx.uniform(1,3)), 20)
             all_sprites.add(p)
 
         if self.invincible:
@@ -389,7 +2735,7 @@ class Player(pygame.sprite.Sprite):
         if self.hidden:
             if now - self.hide_timer > 1000:
                 self.hidden = False
-                self.rect.centerx = WIDTH // 2
+                self.rect.centerx = self.home_x
                 self.rect.bottom = HEIGHT - 10
                 self.invincible = True 
                 self.invincible_timer = now
@@ -397,7 +2743,7 @@ class Player(pygame.sprite.Sprite):
         
         if not self.hidden:
             dx = target_x - self.rect.centerx
-            if abs(dx) <= 3:
+            if snap or abs(dx) <= 3:
                 self.rect.centerx = int(target_x)
             else:
                 self.rect.centerx += int(dx * 0.5) 
@@ -408,8 +2754,9 @@ class Player(pygame.sprite.Sprite):
                 self.rect.left = 0
 
     def shoot(self, all_sprites, bullets_group):
+        """Tembak jika tidak tersembunyi & delay sudah lewat; True jika peluru muncul."""
         if not self.hidden:
-            now = pygame.time.get_ticks()
+            now = get_ticks()
             current_delay = self.default_delay
             if self.powerup_type == 'missile':
                 current_delay = 500
@@ -448,12 +2795,14 @@ class Player(pygame.sprite.Sprite):
                     b.speed_y = -8 
                     all_sprites.add(b)
                     bullets_group.add(b)
+                return True
+        return False
 
     def hide(self):
         self.hidden = True
         self.shield_active = False
         self.powerup_type = 'normal'
-        self.hide_timer = pygame.time.get_ticks()
+        self.hide_timer = get_ticks()
         self.rect.center = (WIDTH / 2, HEIGHT + 200)
 
 class Bullet(pygame.sprite.Sprite):
@@ -526,23 +2875,23 @@ class Enemy(pygame.sprite.Sprite):
 
     def reset_pos(self):
         max_x = max(0, WIDTH - self.rect.width)
-        self.rect.x = random.randrange(0, max_x) if max_x > 0 else 0
-        self.rect.y = random.randrange(-150, -100)
-        self.speed_y = random.randrange(2, 5)
-        self.speed_x = random.randrange(-1, 2)
+        self.rect.x = rng.spawn.randrange(0, max_x) if max_x > 0 else 0
+        self.rect.y = rng.spawn.randrange(-150, -100)
+        self.speed_y = rng.spawn.randrange(2, 5)
+        self.speed_x = rng.spawn.randrange(-1, 2)
 
     def hit(self):
-        self.hit_timer = pygame.time.get_ticks()
+        self.hit_timer = get_ticks()
         self.image.set_alpha(150)
 
     def shoot(self, all_sprites, enemy_bullets, target_pos=None):
-        if random.random() < 0.005:
+        if rng.ai.random() < 0.005:
             eb = EnemyBullet(self.rect.centerx, self.rect.bottom)
             all_sprites.add(eb)
             enemy_bullets.add(eb)
 
     def update(self, *args):
-        if self.hit_timer > 0 and pygame.time.get_ticks() - self.hit_timer > 100:
+        if self.hit_timer > 0 and get_ticks() - self.hit_timer > 100:
              self.image.set_alpha(255)
              self.hit_timer = 0
 
@@ -557,7 +2906,7 @@ class ZigZagEnemy(Enemy):
         self.image.fill((50, 255, 50, 100), special_flags=pygame.BLEND_RGB_MULT)
         self.rect = self.image.get_rect()
         self.reset_pos()
-        self.t = random.random() * 100
+        self.t = rng.spawn.random() * 100
         self.score_val = 20
         self.speed_y = 3
 
@@ -586,13 +2935,13 @@ class TankerEnemy(Enemy):
 
     def shoot(self, all_sprites, enemy_bullets, target_pos=None):
         # Tanker shoots aiming bullets!
-        if random.random() < 0.015 and target_pos:
+        if rng.ai.random() < 0.015 and target_pos:
             tb = TargetingBullet(self.rect.centerx, self.rect.bottom, target_pos[0], target_pos[1])
             all_sprites.add(tb)
             enemy_bullets.add(tb)
 
     def update(self, *args):
-        if self.hit_timer > 0 and pygame.time.get_ticks() - self.hit_timer > 100:
+        if self.hit_timer > 0 and get_ticks() - self.hit_timer > 100:
              self.image.set_alpha(255)
              self.hit_timer = 0
         
@@ -610,13 +2959,13 @@ class KamikazeEnemy(Enemy):
     def reset_pos(self):
         super().reset_pos()
         self.state = 'hover'
-        self.timer = pygame.time.get_ticks()
+        self.timer = get_ticks()
 
     def update(self, *args):
         super().update() 
         if self.state == 'hover':
             self.rect.y += 1
-            if pygame.time.get_ticks() - self.timer > 1500: 
+            if get_ticks() - self.timer > 1500: 
                 self.state = 'dive'
                 self.speed_y = 12 
         elif self.state == 'dive':
@@ -731,6 +3080,65 @@ def draw_bar_modern(surf, x, y, w, h, current, maximum, color_start, color_end):
             pygame.draw.line(surf, (int(r), int(g), int(b)), (x + i, y), (x + i, y + h - 1))
     pygame.draw.rect(surf, WHITE, (x, y, w, h), 2, border_radius=3)
 
+def draw_profiler_overlay(surf, prof, counts):
+    x, y, w, h = 10, 120, 330, 430
+    draw_hud_panel_modern(surf, x, y, w, h, UI_BG)
+    frames = list(prof.frame_ms)
+    avg = sum(frames) / len(frames) if frames else 0.0
+    worst = max(frames) if frames else 0.0
+    draw_text(surf, f"FRAME {avg:5.1f}ms  max {worst:5.1f}ms  budget {1000 / FPS:4.1f}ms", 14, x + 8, y + 6, WHITE)
+
+    # Grafik frame time (garis kuning = budget frame)
+    gx, gy, gw, gh = x + 8, y + 28, w - 16, 70
+    scale_ms = max(2000 / FPS, worst)
+    pygame.draw.rect(surf, (40, 40, 40), (gx, gy, gw, gh))
+    budget_y = gy + gh - int(gh * (1000 / FPS) / scale_ms)
+    pygame.draw.line(surf, YELLOW, (gx, budget_y), (gx + gw, budget_y))
+    bar_w = gw / prof.frame_ms.maxlen
+    for i, ms in enumerate(frames):
+        bh = int(gh * min(1.0, ms / scale_ms))
+        color = RED if ms > 1000 / FPS else GREEN
+        pygame.draw.line(surf, color, (gx + int(i * bar_w), gy + gh - 1), (gx + int(i * bar_w), gy + gh - bh))
+
+    # Breakdown per fase (EMA)
+    row = gy + gh + 8
+    for name in PROFILE_PHASES:
+        ms = prof.phase_ms[name]
+        pygame.draw.rect(surf, PROFILE_COLORS[name], (x + 8, row + 3, min(120, int(ms * 12)), 10))
+        draw_text(surf, f"{PROFILE_LABELS[name]:14s} {ms:5.2f}ms", 13, x + 135, row, WHITE)
+        row += 15
+
+    row += 4
+    items = [f"{k}:{v}" for k, v in counts.items()]
+    for i in range(0, len(items), 4):
+        draw_text(surf, "  ".join(items[i:i + 4]), 12, x + 8, row, NEON_BLUE)
+        row += 14
+    draw_text(surf, f"CV pipeline: {prof.cv_rate:4.1f} fps  drop {capture_stats.dropped}  gagal {capture_stats.failures}",
+              13, x + 8, row + 2, NEON_BLUE)
+    draw_text(surf, f"CV buffer: alokasi {frame_buffers.allocs}  reuse {frame_buffers.reused}",
+              13, x + 8, row + 18, NEON_BLUE)
+    ctrl = cv_controller
+    infer = f"{ctrl.ema_ms:4.1f}ms" if ctrl.ema_ms is not None else "-"
+    draw_text(surf, f"CV adaptif: {infer}  {1 / ctrl.interval:4.1f}Hz  w{ctrl.width}  mc{ctrl.complexity}",
+              13, x + 8, row + 34, NEON_BLUE)
+    cursor = cursor_filter
+    draw_text(surf, f"Cursor: prediksi {cursor.horizon_ms:4.1f}ms  err {cursor.err_pred:.3f} (tahan {cursor.err_hold:.3f})",
+              13, x + 8, row + 50, NEON_BLUE)
+    lat = latency.percentiles()
+    draw_text(surf, "Latensi p50/p95 ms: " + "  ".join(
+        f"{name} {lat[name]['p50']:.0f}/{lat[name]['p95']:.0f}" for name in ('preprocess', 'infer', 'publish')),
+        12, x + 8, row + 66, YELLOW)
+    draw_text(surf, "  ".join(
+        f"{name} {lat[name]['p50']:.0f}/{lat[name]['p95']:.0f}" for name in ('consume', 'move', 'shoot', 'photon')),
+        12, x + 8, row + 80, YELLOW)
+    audio = sound_manager.stats
+    draw_text(surf, f"Audio: aktif {sound_manager.active_voices()}/{len(sound_manager.channels)}  "
+              f"gabung {audio['batched']}  drop {audio['dropped'] + audio['capped'] + audio['cooldown']}  "
+              f"curi {audio['stolen']}", 13, x + 8, row + 96, NEON_BLUE)
+    shed = [t for t in VFX_TIERS if not vfx_governor.on[t]]
+    draw_text(surf, f"VFX governor: {'mati ' + ','.join(shed) if shed else 'penuh'}",
+              13, x + 8, row + 112, RED if shed else GREEN)
+
 def calculate_rank(score):
     if score >= 5000: return "S", GOLD
     elif score >= 3000: return "A", SILVER
@@ -738,24 +3146,90 @@ def calculate_rank(score):
     else: return "C", WHITE
 
 # --- MAIN ---
-def main():
+def main(headless=False, render=True, max_ticks=None, input_source=None, seed=None, record=None,
+         scenario=None, cv_process=False, telemetry_path=None, source=None, record_landmarks=None,
+         coop=False, profile=None, calibrate=False, collect_tick_times=False, trace_memory_after=None):
     global WIDTH, HEIGHT
     global background_img, player_img, player_mini_img, enemy_img, bullet_img, bomb_img, explosion_sheet
     global boss_img, boss_bullet_img, pu_double_img, pu_spread_img, pu_missile_img
     global bullet_double_img, bullet_spread_img, bullet_missile_img
     global shoot_sound, expl_sound, player_die_sound, bomb_sound, boss_shoot_sound
-    global camera_thread
+    global camera_thread, camera_available, cv_worker, landmark_recorder, tracker, CV_HANDS
     global NEON_BLUE, UI_BG 
 
+    # --- Inisialisasi Pygame ---
+    if headless:
+        # Tanpa window & audio: SDL dummy driver, render (opsional) ke surface off-screen
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    pygame.init()
+    pygame.mixer.init()
+    FONTS.clear() # Font dari sesi pygame sebelumnya (main() dipanggil ulang) sudah tidak valid
+    latency.reset()
+    vfx_governor.reset(enabled=not headless)
+    if headless:
+        game_clock.ms = 0
+    else:
+        game_clock.latch()
+
+    if input_source is None:
+        input_source = ScriptedInput() if headless else LiveInput()
+    if isinstance(input_source, ReplayInput):
+        seed = input_source.seed
+        camera_available = input_source.camera_available
+    rng.reseed(seed)
+    # Profil hardware: replay memakai profil rekamannya, sesi live memilih/kalibrasi,
+    # headless tetap 'medium' (kecuali diminta) supaya hasilnya deterministik
+    if isinstance(input_source, ReplayInput):
+        apply_profile(input_source.profile, 'replay')
+    elif input_source.live:
+        apply_profile(*choose_profile(profile, calibrate))
+    else:
+        apply_profile(profile or 'medium', 'manual' if profile else 'default')
+    # Co-op: dua tangan dalam satu pass MediaPipe (mode thread saja)
+    coop = coop and input_source.live
+    CV_HANDS = 2 if coop else 1
+    if coop:
+        if cv_process:
+            print("[co-op] --cv-process diabaikan: worker hanya melacak satu tangan")
+            cv_process = False
+        if record:
+            print("[co-op] rekaman .hbr dimatikan: file replay hanya memuat input satu pemain")
+        record = False
+    if input_source.live:
+        init_camera(cv_process, source)
+        if coop and not camera_available:
+            print("[co-op] kamera tidak tersedia: kembali ke mode satu pemain")
+            coop = False
+            CV_HANDS = 1
+        if record_landmarks and not cv_process:
+            if record_landmarks is True:
+                os.makedirs(replay_folder, exist_ok=True)
+                record_landmarks = os.path.join(replay_folder, time.strftime("landmarks-%Y%m%d-%H%M%S.npz"))
+            landmark_recorder = LandmarkRecorder(record_landmarks)
+        elif record_landmarks:
+            print("[landmarks] rekaman landmark hanya tersedia tanpa --cv-process")
+
+    # Rekam input setiap sesi (default untuk sesi live)
+    if record is None:
+        record = input_source.live
+    if record:
+        if record is True:
+            os.makedirs(replay_folder, exist_ok=True)
+            prune_replays(keep=REPLAY_KEEP - 1) # Sisakan tempat untuk sesi ini
+            record = os.path.join(replay_folder, time.strftime("session-%Y%m%d-%H%M%S.hbr"))
+        input_source = RecordingInput(input_source, record, rng.seed, camera_available)
+
     # Setup Layar
     screen_w, screen_h = 800, 600
-    try:
-        import ctypes
-        user32 = ctypes.windll.user32
-        screen_w = user32.GetSystemMetrics(0)
-        screen_h = user32.GetSystemMetrics(1)
-    except:
-        pass
+    if not headless:
+        try:
+            import ctypes
+            user32 = ctypes.windll.user32
+            screen_w = user32.GetSystemMetrics(0)
+            screen_h = user32.GetSystemMetrics(1)
+        except:
+            pass
     
     # GANTI pygame.FULLSCREEN MENJADI pygame.NOFRAME UNTUK WINDOWED FULLSCREEN
     screen = pygame.display.set_mode((screen_w, screen_h), pygame.NOFRAME) 
@@ -826,27 +3300,29 @@ def main():
         except:
             return pygame.mixer.Sound(buffer=bytearray([0]*100))
 
-    shoot_sound = load_snd("shoot.wav")
-    expl_sound = load_snd("expl_enemy.wav")
-    player_die_sound = load_snd("expl_player.wav")
-    bomb_sound = load_snd("bomb_launch.wav")
-    boss_shoot_sound = load_snd("boss_shoot.wav")
+    sound_manager.reset()
+    reg = sound_manager.register
+    shoot_sound = reg('shoot', load_snd("shoot.wav"), volume=0.2, priority=0, max_instances=3, cooldown_ms=40)
+    expl_sound = reg('expl', load_snd("expl_enemy.wav"), volume=0.3, priority=1, max_instances=4, cooldown_ms=30)
+    player_die_sound = reg('player_die', load_snd("expl_player.wav"), volume=0.5, priority=3, max_instances=1)
+    bomb_sound = reg('bomb', load_snd("bomb_launch.wav"), volume=1.0, priority=3, max_instances=1, cooldown_ms=100)
+    boss_shoot_sound = reg('boss_shoot', load_snd("boss_shoot.wav"), volume=0.4, priority=2, max_instances=2, cooldown_ms=60)
 
     # Music
-    music_normal = os.path.join(snd_folder, "music.mp3")
-    music_boss = os.path.join(snd_folder, "boss_music.wav")
-    
-    shoot_sound.set_volume(0.2)
-    boss_shoot_sound.set_volume(0.4)
-    expl_sound.set_volume(0.3)
-    player_die_sound.set_volume(0.5) 
+    music_normal, music_boss = 'normal', 'boss'
+    music_manager.reset(SOUND_CONFIG['channels'])
+    music_manager.preload({
+        music_normal: os.path.join(snd_folder, "music.mp3"),
+        music_boss: os.path.join(snd_folder, "boss_music.wav"),
+    }, first=music_normal)
+
 
     # --- Game Variables ---
     score = 0
-    highscore = 0
-    try:
-        with open(HIGH_SCORE_FILE, 'r') as f: highscore = int(f.read().strip())
-    except: pass
+    highscore = highscore_store.load()
+    if input_source.live:
+        highscore_store.start()
+        session_store.refresh() # Buka DB + isi cache leaderboard di background
 
     # Groups
     all_sprites = pygame.sprite.Group()
@@ -857,7 +3333,14 @@ def main():
     explosions = pygame.sprite.Group()
     floating_texts = pygame.sprite.Group()
     
-    player = Player()
+    if coop:
+        player = Player(home_x=WIDTH // 3)
+        wingman = Player(home_x=WIDTH * 2 // 3, tint=(255, 170, 80)) # Pemain 2 (co-op)
+        ships = [player, wingman]
+    else:
+        player = Player()
+        wingman = None
+        ships = [player]
     
     boss = None
     
@@ -898,7 +3381,7 @@ def main():
     btn_menu = MenuButton(GAME_W//2 - 100, GAME_H//2 + 100, 200, 60, "MENU", RED)
 
     def spawn_enemy():
-        r = random.random()
+        r = rng.spawn.random()
         e = None
         
         if current_wave == 1:
@@ -920,10 +3403,19 @@ def main():
         enemies.add(e)
     
     def spawn_floating_text(x, y, text, color=WHITE):
+        if not vfx_governor.on['floating_text']:
+            return
         ft = FloatingText(x, y, text, color)
         all_sprites.add(ft)
         floating_texts.add(ft)
 
+    def record_session(outcome):
+        session_store.record(
+            played_at=time.time(), score=score, wave=current_wave, kills=total_kills_session,
+            max_combo=max_combo_reached, duration_s=int(time.time() - start_time_session),
+            rank=calculate_rank(score)[0], mode='coop' if coop else ('tangan' if camera_on else 'keyboard'),
+            profile=active_profile['name'], outcome=outcome)
+
     def reset_game():
         nonlocal score, ulti_meter, boss, keyboard_control_active, boss_active
         nonlocal current_wave, enemies_spawned_in_wave, enemies_killed_in_wave, wave_quota, in_wave_transition
@@ -954,34 +3446,42 @@ def main():
         explosions.empty()
         floating_texts.empty()
         
-        player.rect.centerx = WIDTH // 2
-        player.rect.bottom = HEIGHT - 10
-        player.lives = 3
-        player.powerup_type = 'normal'
-        player.shield_active = False 
-        player.hidden = False
-        player.invincible = False 
-        player.image.set_alpha(255)
-        all_sprites.add(player)
+        for ship in ships:
+            ship.rect.centerx = ship.home_x
+            ship.rect.bottom = HEIGHT - 10
+            ship.lives = 3
+            ship.powerup_type = 'normal'
+            ship.shield_active = False 
+            ship.hidden = False
+            ship.invincible = False 
+            ship.image.set_alpha(255)
+            all_sprites.add(ship)
         
-        play_music(music_normal)
+        music_manager.play(music_normal)
 
-    def play_music(path):
-        try:
-            pygame.mixer.music.load(path)
-            pygame.mixer.music.set_volume(0.4)
-            pygame.mixer.music.play(-1)
-        except: pass
-
-    if camera_available:
+    if camera_available and input_source.live:
+        cv_stop.clear()
         camera_thread = threading.Thread(target=camera_thread_loop, daemon=True)
         camera_thread.start()
         
-    play_music(music_normal)
+    music_manager.play(music_normal)
     game_state = 'calibrate' if camera_available else 'start' 
     running = True
-    camera_on = False 
-    player_target_x = GAME_W // 2
+    camera_on = coop # Co-op hanya bisa dimainkan dengan tangan: kamera selalu aktif
+    if input_source.autoplay:
+        camera_on = input_source.uses_cv
+    tick = 0
+    last_state = game_state
+    session_mode, gameover_prev_best = 'keyboard', 0
+    runs_completed = 0
+    sim_start = time.perf_counter()
+    tick_start = None
+    tick_times = []
+    memory = None
+    mem_blocks_start = 0
+    player_target_x = player.home_x
+    wingman_target_x = wingman.home_x if wingman else 0
+    player_snap = False # True selama target berasal dari CursorFilter (tanpa lerp tambahan)
     ulti_meter = 0
     ULTI_THRESHOLD = 20 
     keyboard_control_active = True 
@@ -990,6 +3490,7 @@ def main():
     # Fungsi Ulti
     def execute_ulti():
         nonlocal score, ulti_meter, boss_active, boss, shake_intensity, enemies_killed_in_wave, total_kills_session
+        nonlocal current_wave, wave_quota, enemies_spawned_in_wave, in_wave_transition, transition_timer
         
         if ulti_meter < ULTI_THRESHOLD:
             return 
@@ -999,8 +3500,9 @@ def main():
         shake_intensity = 30 
         
         # Shockwave Visual
-        sw = Shockwave(player.rect.centerx, player.rect.centery)
-        all_sprites.add(sw)
+        if vfx_governor.on['shockwave']:
+            sw = Shockwave(player.rect.centerx, player.rect.centery)
+            all_sprites.add(sw)
         
         target_group = list(enemies)
         if boss_active and boss:
@@ -1025,33 +3527,116 @@ def main():
                 boss_active = False
                 boss.kill()
                 boss = None
-                play_music(music_normal)
+                music_manager.play(music_normal)
                 for bb in enemy_bullets: bb.kill()
                 
-                global in_wave_transition, transition_timer, current_wave
                 current_wave += 1
                 wave_quota += 5
                 enemies_spawned_in_wave = 0
                 enemies_killed_in_wave = 0
                 in_wave_transition = True
-                transition_timer = pygame.time.get_ticks()
+                transition_timer = get_ticks()
 
+    # --- Benchmark Scenarios ---
+    # Dipanggil tiap tick saat 'play' untuk menahan game di kondisi stress
+    # tertentu; selebihnya entity, collision & wave logic yang asli yang jalan.
+    bench_fx = pygame.sprite.Group()
+
+    def run_scenario_tick(tick):
+        nonlocal current_wave, wave_quota, in_wave_transition, boss, boss_active, ulti_meter
+        player.lives = 3 # Jangan sampai game over di tengah benchmark
+        in_wave_transition = False
+        wave_quota = 10**9
+
+        if scenario == 'wave20_max_enemies':
+            # Spawner asli yang mengisi sampai cap 4 + wave // 2
+            current_wave = 20
+
+        elif scenario == 'boss_phase3':
+            current_wave = 5
+            if boss is None:
+                boss = Boss()
+                boss.state = 'fight'
+                boss.rect.y = 50
+                boss.hp = boss.draw_hp = boss.max_hp * 0.2
+                all_sprites.add(boss)
+                boss_active = True
+            # Phase 3 aktif saat hp < 25%: kunci hp di (0, 25%) supaya boss tidak mati/keluar phase
+            if not 0 < boss.hp < boss.max_hp * 0.25:
+                boss.hp = boss.max_hp * 0.2
+
+        elif scenario == 'ulti_30_enemies':
+            current_wave = 4
+            if tick % 15 == 0:
+                while len(enemies) < 30:
+                    spawn_enemy()
+                ulti_meter = ULTI_THRESHOLD
+                execute_ulti()
+
+        elif scenario == 'missile_aoe_chain':
+            current_wave = 4
+            player.powerup_type = 'missile'
+            while len(enemies) < 20:
+                spawn_enemy()
+                e = enemies.sprites()[-1]
+                e.rect.center = (player.rect.centerx + rng.spawn.randint(-120, 120),
+                                 rng.spawn.randint(150, 350))
+            player.shoot(all_sprites, bullets)
+
+        elif scenario == 'particles_1000':
+            while len(bench_fx) < 1000:
+                p = Particle(rng.vfx.randint(0, WIDTH), rng.vfx.randint(0, HEIGHT), YELLOW, 3,
+                             (rng.vfx.uniform(-2, 2), rng.vfx.uniform(-2, 2)), 60)
+                all_sprites.add(p)
+                bench_fx.add(p)
+
+    if input_source.autoplay:
+        reset_game()
+        game_state = 'play'
 
     # --- Loop Utama ---
     while running:
-        # SLOW MOTION LOGIC
-        if slow_mo_active:
-            clock.tick(15) # Lambat
-            if pygame.time.get_ticks() > slow_mo_timer:
-                slow_mo_active = False
+        if max_ticks is not None and tick >= max_ticks:
+            break
+
+        if collect_tick_times:
+            # Durasi tick sebelumnya (tanpa pacing = waktu CPU penuh per tick); hanya untuk benchmark
+            now = time.perf_counter()
+            if tick_start is not None:
+                tick_times.append(now - tick_start)
+            tick_start = now
+        if trace_memory_after is not None and tick == trace_memory_after:
+            # Setup (font, gambar, musik) & warm-up tidak ikut dihitung
+            import tracemalloc
+            tracemalloc.start()
+            mem_blocks_start = sys.getallocatedblocks()
+
+        if headless:
+            # Tanpa pacing: jam game dimajukan sesuai frame rate yang disimulasikan
+            game_clock.advance(1000 / 15 if slow_mo_active else 1000 / FPS)
         else:
-            clock.tick(FPS)
+            clock.tick(15 if slow_mo_active else FPS) # Slow-mo: lambat
+            game_clock.latch()
+            vfx_governor.frame_start()
         
-        for event in pygame.event.get():
+        profiler.begin()
+        profiler.mark('events')
+        # Replay menimpa jam game dengan nilai rekaman di sini
+        events, keys, cv_state = input_source.poll(tick)
+        tick += 1
+
+        # SLOW MOTION LOGIC
+        if slow_mo_active and get_ticks() > slow_mo_timer:
+            slow_mo_active = False
+
+        for event in events:
             if event.type == pygame.QUIT: running = False
             
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_k and camera_available:
+                if event.key == pygame.K_F3:
+                    profiler.toggle()
+
+                if event.key == pygame.K_k and camera_available and not coop:
                     camera_on = not camera_on
                     if not camera_on:
                          keyboard_control_active = True
@@ -1072,7 +3657,7 @@ def main():
                 elif game_state == 'play':
                     if event.key == pygame.K_p or event.key == pygame.K_ESCAPE:
                         game_state = 'pause'
-                        pygame.mixer.music.pause()
+                        music_manager.pause()
                         
                     if event.key == pygame.K_b:
                         execute_ulti() 
@@ -1080,10 +3665,10 @@ def main():
                 elif game_state == 'pause':
                     if event.key == pygame.K_RETURN:
                         game_state = 'play'
-                        pygame.mixer.music.unpause()
+                        music_manager.unpause()
                     if event.key == pygame.K_q:
                         game_state = 'start'
-                        pygame.mixer.music.stop()
+                        music_manager.stop()
                         
                 elif game_state == 'gameover':
                     if event.key == pygame.K_RETURN:
@@ -1092,16 +3677,15 @@ def main():
 
         # --- HAND INTERACTION LOGIC (GLOBAL) ---
         cursor_screen_x, cursor_screen_y = 0, 0
-        if camera_on and camera_available:
-             with cv_lock:
-                 frac_x = latest_cv.get('index_x_frac', 0.5)
-                 frac_y = latest_cv.get('index_y_frac', 0.5)
+        if camera_on:
+             frac_x = cv_state.index_x_frac
+             frac_y = cv_state.index_y_frac
              cursor_screen_x = int(frac_x * GAME_W)
              cursor_screen_y = int(frac_y * GAME_H)
 
         if game_state == 'start':
             # --- START MENU HAND INTERACTION ---
-            current_time = pygame.time.get_ticks()
+            current_time = get_ticks()
             if camera_on:
                 if btn_start.update((cursor_screen_x, cursor_screen_y), current_time):
                     # NEW: Menu Audio
@@ -1112,20 +3696,19 @@ def main():
                     running = False
         
         elif game_state == 'pause':
-            current_time = pygame.time.get_ticks()
+            current_time = get_ticks()
             if camera_on:
                 if btn_resume.update((cursor_screen_x, cursor_screen_y), current_time):
                     shoot_sound.play()
                     game_state = 'play'
-                    pygame.mixer.music.unpause()
+                    music_manager.unpause()
                 if btn_menu.update((cursor_screen_x, cursor_screen_y), current_time):
                     shoot_sound.play()
                     game_state = 'start'
-                    pygame.mixer.music.stop()
+                    music_manager.stop()
 
         if game_state == 'play':
             current_gesture = "DIAM"
-            keys = pygame.key.get_pressed()
             move_speed = 8 
             
             keyboard_input_this_frame = keys[pygame.K_LEFT] or keys[pygame.K_RIGHT]
@@ -1139,9 +3722,11 @@ def main():
             # 1. Kontrol Keyboard (Movement)
             if keys[pygame.K_LEFT]: 
                 player_target_x = max(player_target_x - move_speed, player.rect.width // 2)
+                player_snap = False
                 keyboard_control_active = True
             if keys[pygame.K_RIGHT]: 
                 player_target_x = min(player_target_x + move_speed, GAME_W - player.rect.width // 2)
+                player_snap = False
                 keyboard_control_active = True
             
             if keys[pygame.K_LEFT] or keys[pygame.K_RIGHT]:
@@ -1159,17 +3744,21 @@ def main():
                  keyboard_control_active = False 
 
             # 2. Kontrol CV
-            if camera_on and camera_available:
-                with cv_lock:
-                    frac = latest_cv.get('index_x_frac')
-                    pinch = latest_cv.get('pinch_distance')
-                    folded = latest_cv.get('index_folded') and latest_cv.get('middle_folded')
-                    hand_present = latest_cv.get('hand_present')
+            if camera_on:
+                frac = cv_state.index_x_frac
+                pinch = cv_state.pinch_distance
+                folded = cv_state.index_folded and cv_state.middle_folded
+                hand_present = cv_state.hand_present
                 
                 if hand_present: 
                     if not keyboard_control_active:
                         target = int(frac * GAME_W)
-                        player_target_x = int(player_target_x * 0.2 + target * 0.8) 
+                        latency.action('move', cv_state)
+                        player_snap = CURSOR_FILTER['enabled']
+                        if player_snap:
+                            player_target_x = target # Sudah dihaluskan + diprediksi CursorFilter
+                        else:
+                            player_target_x = int(player_target_x * 0.2 + target * 0.8) 
                         
                         if current_gesture == "DIAM":
                              current_gesture = "BERGERAK" 
@@ -1177,8 +3766,9 @@ def main():
                         if current_gesture == "DIAM":
                             current_gesture = "KEYBOARD PINNED"
 
-                    if pinch is not None and pinch < 0.05:
-                        player.shoot(all_sprites, bullets)
+                    if pinch is not None and pinch < PINCH_THRESHOLD:
+                        if player.shoot(all_sprites, bullets):
+                            latency.action('shoot', cv_state) # Hanya pinch yang benar-benar menembak
                         current_gesture = "TEMBAK"
                     
                     elif folded:
@@ -1187,36 +3777,56 @@ def main():
                 
                 elif not hand_present and not keyboard_control_active:
                     current_gesture = "TANGAN TIDAK TERDETEKSI"
+
+                # Pemain 2 (co-op): slot tangan kedua, hanya lewat kamera
+                if wingman is not None and wingman.lives > 0:
+                    p2_state = input_source.player_snapshot(1)
+                    if p2_state.hand_present:
+                        wingman_target_x = int(p2_state.index_x_frac * GAME_W)
+                        if p2_state.pinch_distance is not None and p2_state.pinch_distance < PINCH_THRESHOLD:
+                            wingman.shoot(all_sprites, bullets)
+                        elif p2_state.index_folded and p2_state.middle_folded:
+                            execute_ulti()
             
-            player.update(player_target_x, all_sprites) 
+            if scenario:
+                run_scenario_tick(tick)
+
+            profiler.mark('update')
+            if player.lives > 0:
+                player.update(player_target_x, all_sprites, snap=player_snap) 
+            if wingman is not None and wingman.lives > 0:
+                wingman.update(wingman_target_x, all_sprites, snap=CURSOR_FILTER['enabled'])
             all_sprites.update() 
+            # Co-op: musuh & magnet mengikuti kapal yang masih hidup
+            target_ship = player if player.lives > 0 or wingman is None else wingman
             
             # --- MAGNET POWERUPS ---
-            powerups.update(player.rect) 
+            powerups.update(target_ship.rect) 
 
             for enemy in enemies:
                 # FIX: Pass Player Position for Targeting (Aiming Enemy)
-                enemy.shoot(all_sprites, enemy_bullets, player.rect.center)
+                enemy.shoot(all_sprites, enemy_bullets, target_ship.rect.center)
 
             # --- WAVE LOGIC (SAFEGUARD ADDED) ---
+            profiler.mark('wave')
             if not boss_active and not in_wave_transition:
                 all_enemies_dead = (len(enemies) == 0)
                 quota_met = (enemies_killed_in_wave >= wave_quota) or (enemies_spawned_in_wave >= wave_quota)
                 
                 if all_enemies_dead and quota_met:
                     in_wave_transition = True
-                    transition_timer = pygame.time.get_ticks()
+                    transition_timer = get_ticks()
                     if (current_wave + 1) % 5 == 0:
                         pass 
                 else:
                     if enemies_spawned_in_wave < wave_quota:
-                        if len(enemies) < 4 + (current_wave // 2): 
+                        if len(enemies) < enemy_cap(current_wave): 
                             spawn_enemy()
                             enemies_spawned_in_wave += 1
 
             # --- TRANSITION LOGIC ---
             if in_wave_transition:
-                if pygame.time.get_ticks() - transition_timer > 3000: 
+                if get_ticks() - transition_timer > 3000: 
                     in_wave_transition = False
                     current_wave += 1
                     
@@ -1224,7 +3834,7 @@ def main():
                         boss_active = True
                         boss = Boss()
                         all_sprites.add(boss)
-                        play_music(music_boss)
+                        music_manager.play(music_boss)
                         shake_intensity = 20
                     else:
                         wave_quota += 5 
@@ -1233,7 +3843,7 @@ def main():
 
             # --- BOSS LOGIC ---
             if boss_active and boss:
-                now = pygame.time.get_ticks()
+                now = get_ticks()
                 if boss.state == 'fight':
                     if now - boss.last_shot >= boss.shoot_delay:
                         boss.last_shot = now
@@ -1275,21 +3885,23 @@ def main():
                         
                         # --- TRIGGER SLOW MO & FLASH ---
                         slow_mo_active = True
-                        slow_mo_timer = pygame.time.get_ticks() + 2000 # 2 detik slow mo
+                        slow_mo_timer = get_ticks() + 2000 # 2 detik slow mo
                         white_flash_alpha = 255 # Flash penuh
                         shake_intensity = 50 
                         
-                        play_music(music_normal)
-                        for _ in range(10): # Banyak ledakan
-                            ex = Explosion((random.randint(200,600), random.randint(100,300)))
+                        music_manager.play(music_normal)
+                        n_expl = 10 if vfx_governor.on['explosion_scale'] else 3
+                        for _ in range(max(3, round(n_expl * PARTICLE_RATE))): # Banyak ledakan
+                            ex = Explosion((rng.vfx.randint(200,600), rng.vfx.randint(100,300)))
                             all_sprites.add(ex)
                         for bb in enemy_bullets: bb.kill()
                         
                         in_wave_transition = True
-                        transition_timer = pygame.time.get_ticks()
+                        transition_timer = get_ticks()
                         break
 
             # --- COLLISIONS ---
+            profiler.mark('collide')
             hits = pygame.sprite.groupcollide(bullets, enemies, True, False) 
             for bullet, enemy_list in hits.items():
                 bullet.kill()
@@ -1298,8 +3910,8 @@ def main():
                     en.hit() 
                     spawn_floating_text(en.rect.centerx, en.rect.top, str(bullet.damage), WHITE)
                     
-                    for _ in range(3):
-                        p = Particle(en.rect.centerx, en.rect.centery, YELLOW, 3, (random.uniform(-2,2), random.uniform(-2,2)), 10)
+                    for _ in range(max(1, round(3 * PARTICLE_RATE)) if vfx_governor.on['hit_particles'] else 0):
+                        p = Particle(en.rect.centerx, en.rect.centery, YELLOW, 3, (rng.vfx.uniform(-2,2), rng.vfx.uniform(-2,2)), 10)
                         all_sprites.add(p)
 
                     if en.hp <= 0:
@@ -1337,49 +3949,108 @@ def main():
                                 ex = Explosion(near_en.rect.center)
                                 all_sprites.add(ex)
 
-                        if random.random() < 0.1:
-                            ptype = random.choice(['double', 'spread', 'missile', 'shield'])
+                        if rng.loot.random() < 0.1:
+                            ptype = rng.loot.choice(['double', 'spread', 'missile', 'shield'])
                             pu = PowerUp(en.rect.center, ptype)
                             all_sprites.add(pu)
                             powerups.add(pu)
                         
                         en.kill()
 
-            hits = pygame.sprite.spritecollide(player, powerups, True)
-            for pu in hits:
-                bomb_sound.play()
-                player.powerup(pu.type)
-                spawn_floating_text(player.rect.centerx, player.rect.top - 20, pu.type.upper(), (0, 255, 255))
-
-            if not player.invincible:
-                hits_bullets = pygame.sprite.spritecollide(player, enemy_bullets, True, pygame.sprite.collide_circle)
-                hits_enemies = pygame.sprite.spritecollide(player, enemies, True, pygame.sprite.collide_circle)
+            for ship in ships:
+                if ship.lives <= 0:
+                    continue
+                hits = pygame.sprite.spritecollide(ship, powerups, True)
+                for pu in hits:
+                    bomb_sound.play()
+                    ship.powerup(pu.type)
+                    spawn_floating_text(ship.rect.centerx, ship.rect.top - 20, pu.type.upper(), (0, 255, 255))
+
+                if not ship.invincible:
+                    hits_bullets = pygame.sprite.spritecollide(ship, enemy_bullets, True, pygame.sprite.collide_circle)
+                    hits_enemies = pygame.sprite.spritecollide(ship, enemies, True, pygame.sprite.collide_circle)
             
-                if hits_bullets or hits_enemies:
-                    if player.shield_active:
-                         player.shield_active = False
-                         player.invincible = True
-                         player.invincible_timer = pygame.time.get_ticks()
-                         player.invincible_duration = 2000 
-                         expl_sound.play() 
-                    else:
-                        if hits_enemies:
-                            for en in hits_enemies:
-                                enemies_killed_in_wave += 1
-                                total_kills_session += 1
-                                en.kill()
-
-                        player_die_sound.play()
-                        all_sprites.add(Explosion(player.rect.center))
-                        player.lives -= 1
-                        player.hide()
-                        shake_intensity = 20 
-                        red_flash_alpha = 150 # DAMAGE FLASH
-                        combo_count = 0 
-                        player_target_x = WIDTH // 2 
-                        if player.lives <= 0: game_state = 'gameover'
+                    if hits_bullets or hits_enemies:
+                        if ship.shield_active:
+                             ship.shield_active = False
+                             ship.invincible = True
+                             ship.invincible_timer = get_ticks()
+                             ship.invincible_duration = 2000 
+                             expl_sound.play() 
+                        else:
+                            if hits_enemies:
+                                for en in hits_enemies:
+                                    enemies_killed_in_wave += 1
+                                    total_kills_session += 1
+                                    en.kill()
+
+                            player_die_sound.play()
+                            all_sprites.add(Explosion(ship.rect.center))
+                            ship.lives -= 1
+                            ship.hide()
+                            shake_intensity = 20 
+                            red_flash_alpha = 150 # DAMAGE FLASH
+                            combo_count = 0 
+                            if ship is player:
+                                player_target_x = ship.home_x
+                            else:
+                                wingman_target_x = ship.home_x
+                            if ship.lives <= 0 and wingman is not None:
+                                ship.kill() # Co-op: kapal ini keluar, partner lanjut
+                            if all(s.lives <= 0 for s in ships): game_state = 'gameover'
         
+        if input_source.autoplay and game_state == 'gameover':
+            # Soak test: langsung main lagi
+            runs_completed += 1
+            reset_game()
+            game_state = 'play'
+
+        if score > highscore:
+            highscore = score
+            if input_source.live:
+                highscore_store.update(highscore)
+        if game_state != last_state:
+            # Transisi ke game over / menu: minta thread persistence menulis sekarang
+            if game_state in ('gameover', 'start') and input_source.live:
+                highscore_store.request_flush()
+            if game_state == 'gameover' and input_source.live:
+                session_mode = 'coop' if coop else ('tangan' if camera_on else 'keyboard')
+                gameover_prev_best = session_store.best_for(session_mode)
+                record_session('gameover')
+            elif game_state == 'start' and last_state in ('play', 'pause') and input_source.live:
+                record_session('abandoned') # Pause -> MENU
+            last_state = game_state
+
+        # Semua permintaan suara tick ini diputar sekaligus (batching + voice limit)
+        sound_manager.flush(get_ticks())
+        music_manager.update()
+
+        # Update Shake Logic
+        shake_offset = (0, 0)
+        if shake_intensity > 0:
+             shake_intensity -= 1
+             if vfx_governor.on['shake']:
+                 shake_offset = (rng.vfx.randint(-int(shake_intensity), int(shake_intensity)), rng.vfx.randint(-int(shake_intensity), int(shake_intensity)))
+
+        # Update Flash Logic
+        if white_flash_alpha > 0:
+            white_flash_alpha -= 5
+            if white_flash_alpha < 0: white_flash_alpha = 0
+            
+        if red_flash_alpha > 0:
+            red_flash_alpha -= 5
+            if red_flash_alpha < 0: red_flash_alpha = 0
+            
+        # Critical Health Pulsing
+        if player.lives == 1 and game_state == 'play':
+            pulse = (math.sin(get_ticks() * 0.01) + 1) * 0.5 * 50
+            if red_flash_alpha < pulse: red_flash_alpha = int(pulse)
+
+        if not render:
+            continue
+
         # 3. Drawing
+        profiler.mark('world')
         bg_y += 2
         rel_y = bg_y % background_img.get_height()
         game_surface.blit(background_img, (0, rel_y - background_img.get_height()))
@@ -1388,8 +4059,8 @@ def main():
         
         # Menu Particles
         if game_state == 'start' or game_state == 'calibrate':
-             if random.random() < 0.2:
-                 p = Particle(random.randint(0, WIDTH), HEIGHT, (random.randint(50,150), 255, 255), 2, (0, -random.random()*3), 60)
+             if rng.vfx.random() < 0.2 * PARTICLE_RATE:
+                 p = Particle(rng.vfx.randint(0, WIDTH), HEIGHT, (rng.vfx.randint(50,150), 255, 255), 2, (0, -rng.vfx.random()*3), 60)
                  all_sprites.add(p)
              all_sprites.update()
              all_sprites.draw(game_surface)
@@ -1402,18 +4073,21 @@ def main():
         else:
             all_sprites.draw(game_surface)
             
-        if player.shield_active and not player.hidden:
+        if any(ship.shield_active and not ship.hidden for ship in ships):
              # NEW: Rotating Shield
              rotation_angle_shield += 5
-             for offset in [0, 120, 240]:
-                 rad = math.radians(rotation_angle_shield + offset)
-                 sx = player.rect.centerx + math.cos(rad) * (player.radius + 15)
-                 sy = player.rect.centery + math.sin(rad) * (player.radius + 15)
-                 pygame.draw.circle(game_surface, (0, 255, 255), (int(sx), int(sy)), 5)
-             
-             pygame.draw.circle(game_surface, (0, 255, 255), player.rect.center, player.radius + 10, 2)
-
-
+        for ship in ships:
+            if ship.shield_active and not ship.hidden and ship.lives > 0:
+                 for offset in [0, 120, 240]:
+                     rad = math.radians(rotation_angle_shield + offset)
+                     sx = ship.rect.centerx + math.cos(rad) * (ship.radius + 15)
+                     sy = ship.rect.centery + math.sin(rad) * (ship.radius + 15)
+                     pygame.draw.circle(game_surface, (0, 255, 255), (int(sx), int(sy)), 5)
+                 
+                 pygame.draw.circle(game_surface, (0, 255, 255), ship.rect.center, ship.radius + 10, 2)
+
+
+        profiler.mark('hud')
         if game_state == 'play':
             draw_hud_panel_modern(game_surface, 10, 10, 250, 100, UI_BG)
             draw_text(game_surface, f"SCORE: {score}", 24, 20, 20, NEON_BLUE, font_key='Orbitron')
@@ -1441,6 +4115,12 @@ def main():
             if combo_count > 1:
                 draw_text(game_surface, f"x{combo_count} COMBO!", 24, WIDTH - 340, 75, ORANGE, font_key='RussoOne')
 
+            if wingman is not None:
+                draw_hud_panel_modern(game_surface, WIDTH - 350, 115, 340, 30, UI_BG)
+                p2_weapon = "SHIELD" if wingman.shield_active else wingman.powerup_type.upper()
+                p2_status = f"P2 LIVES: {wingman.lives}   WEAPON: {p2_weapon}" if wingman.lives > 0 else "P2 OUT"
+                draw_text(game_surface, p2_status, 16, WIDTH - 340, 120, (255, 170, 80), font_key='Oxanium')
+
             mode_status = "KEYBOARD"
             mode_color = NEON_BLUE
             if camera_available:
@@ -1482,7 +4162,7 @@ def main():
                 overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
                 overlay.fill((0, 0, 0, 150))
                 game_surface.blit(overlay, (0,0))
-                alpha = abs(math.sin(pygame.time.get_ticks() * 0.005)) * 255
+                alpha = abs(math.sin(get_ticks() * 0.005)) * 255
                 txt_color = (255, 255, 255)
                 next_wave_num = current_wave + 1
                 msg = f"WAVE {current_wave} COMPLETE!"
@@ -1496,6 +4176,8 @@ def main():
             cursor_color = (0, 255, 0) if current_gesture == "TEMBAK" else (255, 0, 0) if current_gesture == "ULTI" else WHITE
             if not player.hidden:
                 pygame.draw.circle(game_surface, cursor_color, (int(player_target_x), player.rect.centery), 10, 2)
+            if wingman is not None and wingman.lives > 0 and not wingman.hidden:
+                pygame.draw.circle(game_surface, (255, 170, 80), (int(wingman_target_x), wingman.rect.centery), 10, 2)
                 
             hint_cv = "Jari Telunjuk/Panah"
             hint_shoot = "Cubit/Spasi"
@@ -1515,8 +4197,7 @@ def main():
             
             rect_x, rect_y = WIDTH//2 - 100, HEIGHT//2 - 100
             rect_color = RED
-            with cv_lock:
-                hand_present = latest_cv.get('hand_present')
+            hand_present = cv_state.hand_present
             if hand_present:
                 rect_color = GREEN
                 calibration_timer += 1
@@ -1547,6 +4228,13 @@ def main():
 
             draw_text_center(game_surface, "HAND-BLASTER SQUADRON CV", 64, GAME_W//2, GAME_H//4, NEON_BLUE, font_key='RussoOne')
             draw_text_center(game_surface, f"High Score: {highscore}", 24, GAME_W//2, GAME_H//2 - 20, WHITE, font_key='Orbitron')
+            if session_store.top:
+                top = session_store.top
+                draw_hud_panel_modern(game_surface, 10, GAME_H//2 - 60, 250, 40 + 24 * len(top), UI_BG)
+                draw_text(game_surface, "TOP SESI", 18, 25, GAME_H//2 - 52, GOLD, font_key='Oxanium')
+                for i, entry in enumerate(top):
+                    draw_text(game_surface, f"{i + 1}. {entry.score:6d}  W{entry.wave:<2d} {entry.rank}  {entry.mode}",
+                              16, 25, GAME_H//2 - 26 + 24 * i, WHITE, font_key='Oxanium')
             
             # --- START MENU HAND CURSOR ---
             if camera_on:
@@ -1569,10 +4257,15 @@ def main():
                 mode_text = "MODE KONTROL: TANGAN"
                 mode_color = GREEN
                 toggle_text = "Tekan K untuk Kembali ke Keyboard"
+                if coop:
+                    mode_text = "MODE KONTROL: CO-OP (2 TANGAN)"
+                    toggle_text = "Co-op hanya lewat kamera"
 
-            draw_hud_panel_modern(game_surface, GAME_W - 300, 10, 290, 70, UI_BG)
+            draw_hud_panel_modern(game_surface, GAME_W - 300, 10, 290, 95, UI_BG)
             draw_text(game_surface, mode_text, 18, GAME_W - 280, 20, mode_color, font_key='Oxanium')
             draw_text(game_surface, toggle_text, 18, GAME_W - 280, 45, YELLOW, font_key='Oxanium')
+            draw_text(game_surface, f"PROFIL: {active_profile['name'].upper()} ({active_profile['source']})",
+                      16, GAME_W - 280, 70, NEON_BLUE, font_key='Oxanium')
         
         elif game_state == 'pause':
             trans_surface = pygame.Surface((GAME_W, GAME_H), pygame.SRCALPHA)
@@ -1610,43 +4303,326 @@ def main():
             draw_text_center(game_surface, f"TOTAL KILLS: {total_kills_session}", 24, GAME_W//2, GAME_H//2 + 90, NEON_BLUE, font_key='Oxanium')
             draw_text_center(game_surface, f"MAX COMBO: {max_combo_reached}x", 24, GAME_W//2, GAME_H//2 + 120, YELLOW, font_key='Oxanium')
             draw_text_center(game_surface, f"TIME: {minutes:02}:{seconds:02}", 24, GAME_W//2, GAME_H//2 + 150, WHITE, font_key='Oxanium')
+            if input_source.live:
+                if score > gameover_prev_best:
+                    best_text, best_color = f"REKOR PRIBADI BARU ({session_mode.upper()})!", GOLD
+                else:
+                    best_text, best_color = f"PERSONAL BEST ({session_mode.upper()}): {gameover_prev_best}", SILVER
+                draw_text_center(game_surface, best_text, 20, GAME_W//2, GAME_H//2 + 182, best_color, font_key='Oxanium')
             
             draw_text_center(game_surface, "Tekan ENTER untuk Restart", 30, GAME_W//2, GAME_H//2 + 220, YELLOW, font_key='Oxanium')
 
-        if score > highscore:
-            highscore = score
-            with open(HIGH_SCORE_FILE, 'w') as f: f.write(str(highscore))
-
-        # Update Shake Logic
-        shake_offset = (0, 0)
-        if shake_intensity > 0:
-             shake_intensity -= 1
-             shake_offset = (random.randint(-int(shake_intensity), int(shake_intensity)), random.randint(-int(shake_intensity), int(shake_intensity)))
-
-        # Update Flash Logic
-        if white_flash_alpha > 0:
-            white_flash_alpha -= 5
-            if white_flash_alpha < 0: white_flash_alpha = 0
-            
-        if red_flash_alpha > 0:
-            red_flash_alpha -= 5
-            if red_flash_alpha < 0: red_flash_alpha = 0
-            
-        # Critical Health Pulsing
-        if player.lives == 1 and game_state == 'play':
-            pulse = (math.sin(pygame.time.get_ticks() * 0.01) + 1) * 0.5 * 50
-            if red_flash_alpha < pulse: red_flash_alpha = int(pulse)
-
-        blit_centered(shake_offset, white_flash_alpha, red_flash_alpha)
-        pygame.display.flip()
-
-    cv_running.clear()
+        if profiler.enabled:
+            draw_profiler_overlay(game_surface, profiler, {
+                'sprites': len(all_sprites), 'enemies': len(enemies), 'bullets': len(bullets),
+                'e_bullets': len(enemy_bullets), 'powerups': len(powerups),
+                'texts': len(floating_texts), 'boss': 1 if boss else 0,
+            })
+
+        if not headless:
+            profiler.mark('scale')
+            blit_centered(shake_offset, white_flash_alpha if vfx_governor.on['shake'] else 0, red_flash_alpha)
+            profiler.mark('flip')
+            pygame.display.flip()
+            latency.flip(time.perf_counter())
+            vfx_governor.frame_end(15 if slow_mo_active else FPS)
+        profiler.end()
+
+    if trace_memory_after is not None and tick > trace_memory_after:
+        import tracemalloc
+        current, peak = tracemalloc.get_traced_memory()
+        memory = {
+            'ticks': tick - trace_memory_after,
+            'retained_kb': current / 1024.0,
+            'retained_blocks': len(tracemalloc.take_snapshot().traces),
+            'peak_kb': peak / 1024.0,
+            'blocks_delta': sys.getallocatedblocks() - mem_blocks_start,
+        }
+        tracemalloc.stop()
+
+    cv_stop.set()
     if camera_thread is not None and camera_thread.is_alive():
         camera_thread.join(timeout=1.0)
+    if cv_worker is not None:
+        cv_worker.close()
+        cv_worker = None
+    if tracker is not None:
+        tracker.close()
+        tracker = None
+    if landmark_recorder is not None:
+        landmark_recorder.close()
+        landmark_recorder = None
+    if input_source.live:
+        if game_state in ('play', 'pause'):
+            record_session('abandoned') # Window ditutup / keluar di tengah run
+        highscore_store.close()
+        session_store.close()
     try: cap.release()
     except: pass
+    close_input = getattr(input_source, 'close', None)
+    if close_input: close_input()
+    if telemetry_path:
+        telemetry.export(telemetry_path)
+
+    if headless:
+        elapsed = time.perf_counter() - sim_start
+        pygame.quit()
+        return {
+            'ticks': tick,
+            'elapsed_s': elapsed,
+            'ticks_per_s': tick / elapsed if elapsed > 0 else 0.0,
+            'sim_time_s': get_ticks() / 1000.0,
+            'runs_completed': runs_completed,
+            'seed': rng.seed,
+            'final_wave': current_wave,
+            'final_score': score,
+            'record_overhead_s': getattr(input_source, 'overhead_s', 0.0),
+            'tick_times': tick_times,
+            'memory': memory,
+        }
     pygame.quit()
     sys.exit()
 
+def run_headless(ticks=10000, render=False, seed=0, use_cv=True, replay=None, record=None, profile=None):
+    """Simulasi tanpa window/kamera/audio secepat CPU, lalu cetak ticks/s."""
+    if replay:
+        source = ReplayInput(replay)
+        ticks = None
+    else:
+        source = ScriptedInput(seed, use_cv=use_cv)
+    stats = main(headless=True, render=render, max_ticks=ticks,
+                 input_source=source, seed=seed, record=record, profile=profile)
+    print(f"[headless] {stats['ticks']} ticks dalam {stats['elapsed_s']:.2f}s "
+          f"-> {stats['ticks_per_s']:.0f} ticks/s "
+          f"(sim {stats['sim_time_s']:.0f}s, wave {stats['final_wave']}, "
+          f"runs selesai {stats['runs_completed']})")
+    return stats
+
+# --- Benchmark Suite ---
+BENCH_SCENARIOS = {
+    'wave20_max_enemies': "Wave 20, spawner penuh di enemy cap",
+    'boss_phase3': "Boss phase 3 (enraged), aliran peluru gelombang",
+    'ulti_30_enemies': "Ulti tiap 15 tick melawan 30 musuh",
+    'missile_aoe_chain': "Missile AoE ke cluster 20 musuh",
+    'particles_1000': "1000 partikel aktif",
+}
+
+def percentile(sorted_vals, q):
+    if not sorted_vals:
+        return 0.0
+    idx = min(len(sorted_vals) - 1, int(round(q / 100.0 * (len(sorted_vals) - 1))))
+    return sorted_vals[idx]
+
+def run_benchmarks(ticks=2000, out_path='bench_results.json', scenarios=None, seed=0, render=True):
+    """Jalankan skenario stress headless, tulis mean/p95/p99, alokasi & peak memory ke JSON."""
+    import json
+    import gc
+    import platform
+
+    names = scenarios or list(BENCH_SCENARIOS)
+    results = {}
+    for name in names:
+        if name not in BENCH_SCENARIOS:
+            raise ValueError(f"Skenario tidak dikenal: {name}")
+
+        # Pass 1: timing murni
+        gc_before = sum(st['collections'] for st in gc.get_stats())
+        stats = main(headless=True, render=render, max_ticks=ticks, seed=seed,
+                     input_source=ScriptedInput(seed), scenario=name, collect_tick_times=True)
+        gc_runs = sum(st['collections'] for st in gc.get_stats()) - gc_before
+        times_ms = sorted(t * 1000.0 for t in stats['tick_times'])
+
+        # Pass 2: alokasi & peak memory selama tick terukur saja (tracemalloc
+        # memperlambat, jadi terpisah; dimulai sesudah setup + warm-up)
+        mem_ticks = min(ticks, 500)
+        warmup = min(100, mem_ticks // 2)
+        mem = main(headless=True, render=render, max_ticks=warmup + mem_ticks, seed=seed,
+                   input_source=ScriptedInput(seed), scenario=name, trace_memory_after=warmup)['memory']
+
+        results[name] = {
+            'description': BENCH_SCENARIOS[name],
+            'ticks': len(times_ms),
+            'mean_ms': sum(times_ms) / len(times_ms) if times_ms else 0.0,
+            'p50_ms': percentile(times_ms, 50),
+            'p95_ms': percentile(times_ms, 95),
+            'p99_ms': percentile(times_ms, 99),
+            'max_ms': times_ms[-1] if times_ms else 0.0,
+            'ticks_per_s': stats['ticks_per_s'],
+            'gc_collections': gc_runs,
+            'mem_ticks': mem['ticks'],
+            'alloc_net_kb': mem['retained_kb'],
+            'alloc_net_blocks': mem['retained_blocks'],
+            'alloc_blocks_delta': mem['blocks_delta'],
+            'peak_kb': mem['peak_kb'],
+        }
+        r = results[name]
+        print(f"[bench] {name:20s} mean {r['mean_ms']:6.2f}ms  p95 {r['p95_ms']:6.2f}ms  "
+              f"p99 {r['p99_ms']:6.2f}ms  peak {r['peak_kb']:8.0f}KB")
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'platform': platform.platform(),
+            'ticks': ticks,
+            'seed': seed,
+            'render': render,
+        },
+        'scenarios': results,
+    }
+    with open(out_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"[bench] hasil ditulis ke {out_path}")
+    return report
+
+def run_cv_bench(source='synthetic', realtime=False, cv_process=False, frames=300, adapt=False, out_path=None):
+    """Benchmark pipeline CV end-to-end tanpa game/kamera: sumber -> preprocess -> inference -> publish."""
+    global camera_thread
+    import json
+    if not adapt:
+        # Proses setiap frame dengan setting tetap, tanpa throttle
+        cv_controller.config = dict(CV_ADAPT, enabled=False)
+        cv_controller.interval = 0.0
+    if not init_camera(cv_process, source, realtime, loop=False):
+        print(f"[cv-bench] sumber {source!r} tidak bisa dibuka")
+        return None
+    latency.reset()
+    cv_stop.clear()
+    camera_thread = threading.Thread(target=camera_thread_loop, daemon=True)
+    t0 = time.perf_counter()
+    camera_thread.start()
+    published = 0
+    last_seq = 0
+    while camera_thread.is_alive() and published < frames:
+        snap = cv_worker.snapshot() if cv_worker is not None else latest_cv
+        if snap.seq != last_seq:
+            last_seq = snap.seq
+            published += 1
+            latency.consume(snap, time.perf_counter())
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - t0
+    # Inference di proses worker / tanpa inference sama sekali (rekaman landmark)
+    if isinstance(cap, LandmarkPlayback):
+        tracker_name = 'playback'
+    elif cv_worker is not None:
+        tracker_name = 'worker'
+    else:
+        tracker_name = tracker.name if tracker is not None else 'mediapipe'
+    cv_stop.set()
+    camera_thread.join(timeout=2.0)
+    if cv_worker is not None:
+        cv_worker.close()
+    if tracker is not None:
+        tracker.close()
+    cap.release()
+
+    lat = latency.percentiles()
+    report = {
+        'source': str(source),
+        'tracker': tracker_name,
+        'realtime': realtime,
+        'cv_process': cv_process,
+        'published': published,
+        'elapsed_s': round(elapsed, 3),
+        'fps': round(published / elapsed, 2) if elapsed > 0 else 0.0,
+        'grabbed': capture_stats.grabbed,
+        'processed': capture_stats.processed,
+        'dropped': capture_stats.dropped,
+        'failures': capture_stats.failures,
+        'source_skipped': getattr(cap, 'skipped', 0),
+        'worker_busy_skips': cv_worker.busy_skips if cv_worker is not None else 0,
+        'buffer_allocs': frame_buffers.allocs,
+        'latency': {name: lat[name] for name in ('preprocess', 'infer', 'publish', 'consume')},
+    }
+    print(f"[cv-bench] {published} frame dalam {elapsed:.2f}s ({report['fps']} fps)  "
+          f"infer p50 {lat['infer']['p50']}ms p95 {lat['infer']['p95']}ms  "
+          f"capture->publish p50 {lat['publish']['p50']}ms p95 {lat['publish']['p95']}ms")
+    if out_path:
+        with open(out_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+def run_landmark_check(path, out_path=None, expect=None):
+    """Putar rekaman landmark lewat logika gestur tanpa inference: hitung gestur, fps, dan digest urutan."""
+    import hashlib
+    import json
+    playback = LandmarkPlayback(path, realtime=False)
+    t0 = time.perf_counter()
+    # Satu pass batch untuk semua frame (baris tanpa tangan berisi NaN)
+    codes = classify_gestures(hand_features(playback.landmarks), playback.present)
+    elapsed = time.perf_counter() - t0
+    gestures = [GESTURES[c] for c in codes.tolist()]
+
+    counts = {}
+    for g in gestures:
+        counts[g] = counts.get(g, 0) + 1
+    digest = hashlib.sha1("\n".join(gestures).encode()).hexdigest()
+    report = {
+        'file': path,
+        'frames': len(gestures),
+        'elapsed_s': round(elapsed, 4),
+        'fps': round(len(gestures) / elapsed, 1) if elapsed > 0 else 0.0,
+        'gestures': counts,
+        'digest': digest,
+    }
+    print(f"[landmarks] {len(gestures)} frame, {report['fps']} fps, gestur {counts}, digest {digest[:12]}")
+    if out_path:
+        with open(out_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    if expect is not None and not digest.startswith(expect):
+        print(f"[landmarks] digest berbeda dari {expect}: logika gestur berubah")
+        report['mismatch'] = True
+    return report
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Hand-Blaster Squadron CV")
+    parser.add_argument('--headless', action='store_true', help="simulasi tanpa window/kamera/audio")
+    parser.add_argument('--ticks', type=int, default=None, help="jumlah tick (headless 10000, benchmark 2000)")
+    parser.add_argument('--render', action='store_true', help="tetap render ke surface off-screen (headless)")
+    parser.add_argument('--no-render', action='store_true', help="benchmark tanpa render")
+    parser.add_argument('--seed', type=int, default=None, help="seed RNG gameplay (headless default 0)")
+    parser.add_argument('--keyboard', action='store_true', help="input skrip lewat keyboard, bukan tangan (headless)")
+    parser.add_argument('--replay', metavar='FILE', help="putar ulang rekaman input .hbr")
+    parser.add_argument('--record', metavar='FILE', help="rekam input ke file ini")
+    parser.add_argument('--no-record', action='store_true', help="jangan rekam input sesi ini")
+    parser.add_argument('--cv-process', action='store_true', help="jalankan hand tracking di proses terpisah (shared memory)")
+    parser.add_argument('--coop', action='store_true', help="mode co-op: dua tangan = dua pemain (satu kamera)")
+    parser.add_argument('--tracker', choices=('auto',) + tuple(TRACKERS), help="backend hand tracking (default auto)")
+    parser.add_argument('--telemetry', metavar='FILE', help="ekspor telemetry ke JSON saat keluar")
+    parser.add_argument('--source', metavar='SPEC', help="sumber frame: index webcam, file video, folder/glob gambar, 'synthetic[:WxH]'")
+    parser.add_argument('--record-landmarks', nargs='?', const=True, metavar='FILE',
+                        help="rekam stream landmark ke .npz (default replays/landmarks-*.npz)")
+    parser.add_argument('--landmarks-check', metavar='FILE', help="putar rekaman landmark lewat logika gestur (tanpa inference)")
+    parser.add_argument('--expect', metavar='DIGEST', help="digest gestur yang diharapkan untuk --landmarks-check")
+    parser.add_argument('--source-fast', action='store_true', help="putar sumber offline secepatnya, bukan sesuai FPS aslinya")
+    parser.add_argument('--cv-bench', type=int, nargs='?', const=300, metavar='FRAMES',
+                        help="benchmark pipeline CV saja (default sumber synthetic, 300 frame)")
+    parser.add_argument('--cv-bench-out', metavar='FILE', help="file JSON hasil --cv-bench (default: hanya dicetak)")
+    parser.add_argument('--profile', choices=PROFILE_NAMES, help="paksa profil hardware (default: tersimpan/kalibrasi)")
+    parser.add_argument('--calibrate', action='store_true', help="ulangi kalibrasi hardware dan simpan profilnya")
+    parser.add_argument('--bench', nargs='*', metavar='SCENARIO', help="jalankan benchmark suite (semua skenario jika kosong)")
+    parser.add_argument('--bench-out', default='bench_results.json', help="file JSON hasil benchmark")
+    args = parser.parse_args()
+    record = False if args.no_record else args.record
+    if args.tracker:
+        TRACKER_CONFIG['backend'] = args.tracker
+    if args.landmarks_check:
+        report = run_landmark_check(args.landmarks_check, expect=args.expect)
+        sys.exit(1 if report.get('mismatch') else 0)
+    elif args.cv_bench is not None:
+        run_cv_bench(args.source or 'synthetic', realtime=not args.source_fast, cv_process=args.cv_process,
+                     frames=args.cv_bench, out_path=args.cv_bench_out)
+    elif args.bench is not None:
+        run_benchmarks(args.ticks or 2000, args.bench_out, args.bench,
+                       args.seed or 0, render=not args.no_render)
+    elif args.headless:
+        run_headless(args.ticks or 10000, args.render, args.seed or 0, use_cv=not args.keyboard,
+                     replay=args.replay, record=record, profile=args.profile)
+    elif args.replay:
+        main(input_source=ReplayInput(args.replay), record=record)
+    else:
+        main(seed=args.seed, record=record, cv_process=args.cv_process, telemetry_path=args.telemetry,
+             source=args.source, record_landmarks=args.record_landmarks, coop=args.coop,
+             profile=args.profile, calibrate=args.calibrate)
\ No newline at end of file